@@ -0,0 +1,90 @@
+""" Latency of quick API calls while other clients wait on the serial link, per Pyro server type.
+
+Some clients make calls which take --serial-delay seconds, like a request waiting on the controller, while the others
+make calls which are answered right away, like cache hits and log queries.
+
+    python benchmarks/pyro_server_modes.py [--slow-clients N] [--fast-clients N] [--calls N] [--serial-delay S]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from threading import Thread
+
+import Pyro5.api
+import Pyro5.errors
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from _kaskas.pyro_server import PyroServer  # noqa: E402
+
+
+@Pyro5.api.expose
+class StandInAPI:
+    """ Mimics the timing of KasKasAPI without a controller """
+
+    def __init__(self, serial_delay: float) -> None:
+        self._serial_delay = serial_delay
+
+    def request(self, module: str, command: str) -> str:
+        time.sleep(self._serial_delay)
+        return f"{module}<OK:{command}"
+
+    def cache_statistics(self) -> dict[str, int]:
+        return {"hits": 0}
+
+
+def run(server_type: str, args) -> list[float]:
+    server = PyroServer(server_type=server_type, workers=args.slow_clients + args.fast_clients + 4)
+    uri = server.serve_object(StandInAPI(args.serial_delay), f"benchmark.{server_type}")
+    latencies = []
+    running = True
+
+    def slow_client():
+        with Pyro5.api.Proxy(uri) as api:
+            while running:
+                try:
+                    api.request("Fluids", "waterNow")
+                except Pyro5.errors.CommunicationError:
+                    break  # the server is shutting down
+
+    def fast_client():
+        with Pyro5.api.Proxy(uri) as api:
+            api._pyroBind()
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                api.cache_statistics()
+                latencies.append(time.perf_counter() - start)
+
+    slow = [Thread(target=slow_client, daemon=True) for _ in range(args.slow_clients)]
+    fast = [Thread(target=fast_client) for _ in range(args.fast_clients)]
+    for thread in slow + fast:
+        thread.start()
+    for thread in fast:
+        thread.join()
+    running = False
+    server.stop(blocking=True)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slow-clients", type=int, default=2)
+    parser.add_argument("--fast-clients", type=int, default=4)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--serial-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'server type':<16}{'p50 (ms)':>12}{'p99 (ms)':>12}{'calls/s':>12}")
+    for server_type in PyroServer.SERVER_TYPES:
+        start = time.perf_counter()
+        latencies = run(server_type, args)
+        elapsed = time.perf_counter() - start
+        p50 = statistics.median(latencies) * 1e3
+        p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1e3
+        print(f"{server_type:<16}{p50:>12.2f}{p99:>12.2f}{len(latencies) / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+""" Per-message latency and throughput of the queues that can carry API lines from the I/O thread to a consumer.
+
+    python benchmarks/queue_latency.py [--messages N]
+"""
+import argparse
+import multiprocessing
+import queue
+import statistics
+import sys
+import threading
+import time
+import timeit
+from pathlib import Path
+from threading import Thread
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from _kaskas.utils.local_queue import LocalQueue  # noqa: E402
+
+LINE = "Fluids<OK:isOutOfWater|False~1234"
+
+
+def measure_latency(factory, messages: int) -> list[float]:
+    """ Ping-pong: the consumer answers every message before the next one is sent """
+    q, replies = factory(), factory()
+
+    def consumer():
+        for _ in range(messages):
+            replies.put(q.get())
+
+    thread = Thread(target=consumer)
+    thread.start()
+    latencies = []
+    for _ in range(messages):
+        start = time.perf_counter()
+        q.put(LINE)
+        replies.get()
+        latencies.append((time.perf_counter() - start) / 2)
+    thread.join()
+    return latencies
+
+
+def measure_throughput(factory, messages: int) -> float:
+    """ Messages per second from one producer thread to one consumer thread """
+    q = factory()
+
+    def consumer():
+        for _ in range(messages):
+            q.get()
+
+    thread = Thread(target=consumer)
+    start = time.perf_counter()
+    thread.start()
+    for _ in range(messages):
+        q.put(LINE)
+    thread.join()
+    return messages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    args = parser.parse_args()
+
+    candidates = {
+        "multiprocessing.Queue": multiprocessing.Queue,
+        "queue.Queue": queue.Queue,
+        "LocalQueue": LocalQueue,
+    }
+    print(f"{'queue':<24}{'p50 (us)':>12}{'p99 (us)':>12}{'msg/s':>14}")
+    for name, factory in candidates.items():
+        latencies = sorted(measure_latency(factory, args.messages // 4))
+        throughput = measure_throughput(factory, args.messages)
+        p50 = statistics.median(latencies) * 1e6
+        p99 = latencies[int(0.99 * (len(latencies) - 1))] * 1e6
+        print(f"{name:<24}{p50:>12.1f}{p99:>12.1f}{throughput:>14,.0f}")
+
+    print(f"\n{'lock':<24}{'acquire+release (ns)':>26}")
+    for name, factory in {"multiprocessing.Lock": multiprocessing.Lock, "threading.Lock": threading.Lock}.items():
+        lock = factory()
+
+        def acquire_release():
+            with lock:
+                pass
+
+        print(f"{name:<24}{min(timeit.repeat(acquire_release, number=args.messages, repeat=5)) / args.messages * 1e9:>26.0f}")
+
+
+if __name__ == "__main__":
+    main()
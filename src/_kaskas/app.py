@@ -1,5 +1,6 @@
 from _kaskas.log import log
 
+from datetime import datetime
 from pathlib import Path
 from types import TracebackType
 from typing import *
@@ -153,7 +154,7 @@ def inject_kaskas(app: typer.Typer, daemon: Daemon, progress: Progress):
         progress.stop()
 
         def print_help():
-            print(f"Request should be formatted as 'MODULE:COMMAND:ARG|ARG'")
+            print(f"Request should be formatted as 'MODULE:COMMAND:ARG|ARG', or 'logs' for the recent firmware log")
 
         history = []
 
@@ -183,8 +184,14 @@ def inject_kaskas(app: typer.Typer, daemon: Daemon, progress: Progress):
                 print(response.arguments)
                 print(str(response.arguments[0]))
 
+            def process_print_logs_request(input: str):
+                for record in daemon.api.recent_logs(limit=50):
+                    print(f"{datetime.fromtimestamp(record['time'])} {record['level']}: {record['text']}")
+
             if input == "?":  # this is a request to print usage
                 process_print_usage_request(input)
+            elif input == "logs":  # this is a request to print the recent firmware log
+                process_print_logs_request(input)
             else:
                 process_api_request(input)
 
@@ -202,11 +209,22 @@ def inject_kaskas(app: typer.Typer, daemon: Daemon, progress: Progress):
 
     @app.command("daemon")
     def start_daemon(remote: Annotated[bool, typer.Option(help=".")] = False,
-                     remote_host: Annotated[str, typer.Option(help=".")] = None, ):
+                     remote_host: Annotated[str, typer.Option(help=".")] = None,
+                     isolated_datalink: Annotated[bool, typer.Option(
+                         help="Run the serial I/O of every controller in a process of its own.")] = False,
+                     server_type: Annotated[str, typer.Option(
+                         help="Pyro server type: 'multiplex' (one thread) or 'thread' (a worker per client).")] = "multiplex",
+                     workers: Annotated[int, typer.Option(help="Worker threads of the 'thread' server type.")] = 16,
+                     max_pending: Annotated[Optional[int], typer.Option(
+                         help="Answer requests beyond this many waiting for the controller with BUSY.")] = None,
+                     unix_socket: Annotated[bool, typer.Option(
+                         help="Also serve the API on a Unix domain socket in the user directory.")] = True, ):
         """[blue]Set[/blue] a value for a key."""
 
         p = progress.add_task(description="Launching API...", total=None)
-        daemon.launch_api(remote=remote, remote_host=remote_host)
+        daemon.launch_api(remote=remote, remote_host=remote_host, isolated_datalink=isolated_datalink,
+                          server_type=server_type, workers=workers, max_pending=max_pending,
+                          unix_socket=unix_socket)
         progress.remove_task(p)
 
         p = progress.add_task(description="Launching collector...", total=None)
@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+from typing import Optional, Sequence
+
+import Pyro5.api
+import Pyro5.core
+
+from _kaskas.kaskas_api import KasKasAPI, Response
+from _kaskas.request_scheduler import Priority
+from _kaskas.utils.proxy_pool import PooledProxy
+
+Request = tuple[str, Optional[str], Optional[list[str]]]
+
+
+class AsyncKasKasClient:
+    """ asyncio client of a KasKasAPI, either a local instance or a remote one behind a Pyro uri, proxy or PooledProxy.
+
+    Requests that are issued in the same iteration of the event loop are sent to a remote API as a single
+    request_many() call, so a single coroutine can have many requests outstanding without a Pyro call each. Pyro calls
+    run on a small thread pool where every thread has its own proxy. A local API is used without any threads at all.
+
+        async with AsyncKasKasClient("PYRONAME:kaskas.api") as client:
+            out_of_water, effect = await client.gather(("Fluids", "isOutOfWater"), ("Fluids", "injectionEffect"))
+    """
+
+    _api: Optional[KasKasAPI]
+    _uri: Optional[str]
+    _pooled: Optional[PooledProxy]
+
+    _executor: Optional[ThreadPoolExecutor]
+    _proxies: local
+    _batches: dict[tuple, list[tuple[Request, asyncio.Future]]]
+
+    def __init__(self, api: KasKasAPI | PooledProxy | Pyro5.api.Proxy | Pyro5.core.URI | str, workers: int = 4) -> None:
+        self._api = api if isinstance(api, KasKasAPI) else None
+        self._pooled = api if isinstance(api, PooledProxy) else None  # already safe to share between threads
+        if isinstance(api, Pyro5.api.Proxy):
+            self._uri = str(api._pyroUri)  # a proxy belongs to one thread, every worker connects one of its own
+        elif isinstance(api, (Pyro5.core.URI, str)):
+            self._uri = str(api)
+        elif self._api is None and self._pooled is None:
+            raise TypeError(f"AsyncKasKasClient needs a KasKasAPI, or a Pyro uri or proxy of one, not {type(api)}")
+        else:
+            self._uri = None
+        remote = self._api is None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kaskas-async") if remote else None
+        self._proxies = local()
+        self._batches = {}
+
+    async def request(self, module: str, command: Optional[str], args: Optional[list[str]] = None,
+                      priority: Optional[Priority] = None, timeout: Optional[float] = None) -> Response:
+        if self._api is not None:
+            return await asyncio.wrap_future(
+                self._api._request_async(module, command, args, priority=priority, timeout=timeout))
+
+        batch_key = (priority, timeout)
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = self._batches[batch_key] = []
+            asyncio.get_running_loop().call_soon(self._flush, batch_key)
+        response = asyncio.get_running_loop().create_future()
+        batch.append(((module, command, args), response))
+        return await response
+
+    async def request_many(self, requests: Sequence[Sequence], priority: Optional[Priority] = None,
+                           timeout: Optional[float] = None) -> list[Response]:
+        return await self.gather(*requests, priority=priority, timeout=timeout)
+
+    async def gather(self, *requests: Sequence, priority: Optional[Priority] = None,
+                     timeout: Optional[float] = None) -> list[Response]:
+        """ Await the responses to all (module, command[, args]) requests, in order """
+        return list(await asyncio.gather(*[
+            self.request(module, command, rest[0] if rest else None, priority=priority, timeout=timeout)
+            for module, command, *rest in requests
+        ]))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncKasKasClient":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def _flush(self, batch_key: tuple) -> None:
+        batch = self._batches.pop(batch_key)
+        priority, timeout = batch_key
+        requests = [request for request, _ in batch]
+        call = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._request_many_remote, requests, priority, timeout)
+        call.add_done_callback(lambda call: self._deliver(batch, call))
+
+    @staticmethod
+    def _deliver(batch: list[tuple[Request, asyncio.Future]], call: asyncio.Future) -> None:
+        error = "cancelled" if call.cancelled() else call.exception()
+        if error is not None:
+            responses = [Response(Response.Status.COMMUNICATION_ERROR, [str(error)]) for _ in batch]
+        else:
+            responses = call.result()
+        for (_, response), result in zip(batch, responses):
+            if not response.done():
+                response.set_result(result)
+
+    def _request_many_remote(self, requests: list[Request], priority: Optional[Priority],
+                             timeout: Optional[float]) -> list[Response]:
+        if self._pooled is not None:
+            return self._pooled.request_many(requests, priority=priority, timeout=timeout)
+        proxy = getattr(self._proxies, "proxy", None)
+        if proxy is None:
+            proxy = self._proxies.proxy = Pyro5.api.Proxy(self._uri)
+        return proxy.request_many(requests, priority=priority, timeout=timeout)
@@ -0,0 +1,145 @@
+import struct
+from typing import Any, Optional
+
+from _kaskas.command_schema import decode_value
+from _kaskas.dialect import Dialect
+from _kaskas.utils.cobs import seal, unseal
+
+
+class BinaryDialect:
+    """ Compact framing of API requests and replies, negotiated with the firmware at runtime.
+
+    A frame is a COBS encoded payload with a trailing crc16, between two zero bytes. Text lines never contain a zero
+    byte, so frames and text lines (eg. logs) can share the link. Module and command names are replaced by the ids
+    the firmware announced at handshake, and values are packed as tagged little-endian numbers:
+
+        request:  0x01 | request id (u16) | command id (u16) | value*
+        reply:    0x02 | request id (u16) | command id (u16) | status (u8) | value*
+        value:    'b' u8 | 'i' i32 | 'f' f32 | 's' length (u8) utf-8
+
+    The handshake is a text request 'Binary:begin:<version>', answered with the version and the command table,
+    eg. '@Binary<OK:1|Fluids:isOutOfWater=1|Fluids:waterNow=2>'.
+    """
+
+    VERSION = 1
+    HANDSHAKE = ("Binary", "begin")
+
+    FRAME_DELIMITER = 0x00
+    FRAME_REQUEST = 0x01
+    FRAME_REPLY = 0x02
+    NO_REQUEST_ID = 0xFFFF
+
+    # reply status codes, in the order of Response.Status
+    STATUSES = ("OK", "BAD_INPUT", "BAD_RESULT", "BAD_RESPONSE", "COMMUNICATION_ERROR", "TIMEOUT", "UNKNOWN_ERROR")
+
+    _HEADER = struct.Struct("<BHH")
+    _STATUS = struct.Struct("<B")
+    _PACKERS: dict[int, struct.Struct] = {
+        ord("b"): struct.Struct("<B"),
+        ord("i"): struct.Struct("<i"),
+        ord("f"): struct.Struct("<f"),
+    }
+
+    _command_ids: dict[tuple[str, str], int]
+    _commands: dict[int, tuple[str, str]]
+
+    def __init__(self, command_ids: dict[tuple[str, str], int]) -> None:
+        self._command_ids = dict(command_ids)
+        self._commands = {command_id: command for command, command_id in self._command_ids.items()}
+
+    @property
+    def command_ids(self) -> dict[tuple[str, str], int]:
+        return dict(self._command_ids)
+
+    @staticmethod
+    def from_handshake(arguments: list[str]) -> "BinaryDialect":
+        """ The dialect for the command table in the reply to the handshake, raises ValueError when it is unusable """
+        if not arguments or arguments[0] != str(BinaryDialect.VERSION):
+            raise ValueError(f"Unsupported binary framing version: {arguments[0] if arguments else None}")
+        command_ids = {}
+        for entry in arguments[1:]:
+            name, _, command_id = entry.partition("=")
+            module, _, command = name.partition(Dialect.Operator.REQUEST.value)
+            if not module or not command or not command_id.isdigit():
+                raise ValueError(f"Malformed command table entry: '{entry}'")
+            command_ids[(module, command)] = int(command_id)
+        return BinaryDialect(command_ids)
+
+    def supports(self, module: str, command: Optional[str]) -> bool:
+        return (module, command) in self._command_ids
+
+    def format_request(self, module: str, command: str, args: Optional[list[str]] = None,
+                       request_id: Optional[int] = None, types: Optional[list[str]] = None) -> bytes:
+        """ The frame of a request, its arguments packed as the given types or as the most specific type they fit """
+        payload = bytearray(self._HEADER.pack(
+            self.FRAME_REQUEST, self.NO_REQUEST_ID if request_id is None else request_id,
+            self._command_ids[(module, command)]))
+        for index, argument in enumerate(args or []):
+            if argument == "":
+                continue
+            payload += self._pack(decode_value(argument, types[index] if types and index < len(types) else None))
+        return bytes([self.FRAME_DELIMITER]) + seal(bytes(payload)) + bytes([self.FRAME_DELIMITER])
+
+    def parse_reply(self, frame: bytes) -> str:
+        """ The text line equivalent of a reply frame (without delimiters), eg. 'Fluids<OK:True~12'
+
+        Raises ValueError when the frame is corrupt or refers to an unknown command.
+        """
+        payload = unseal(frame)
+        if len(payload) < self._HEADER.size + self._STATUS.size:
+            raise ValueError("Reply frame too short")
+        frame_type, request_id, command_id = self._HEADER.unpack_from(payload)
+        (status,) = self._STATUS.unpack_from(payload, self._HEADER.size)
+        if frame_type != self.FRAME_REPLY:
+            raise ValueError(f"Unexpected frame type: {frame_type:#04x}")
+        if command_id not in self._commands:
+            raise ValueError(f"Unknown command id: {command_id}")
+        if status >= len(self.STATUSES):
+            raise ValueError(f"Unknown status: {status}")
+
+        module, _ = self._commands[command_id]
+        try:
+            values = self._unpack(memoryview(payload)[self._HEADER.size + self._STATUS.size:])
+        except (struct.error, IndexError) as e:
+            raise ValueError(f"Truncated value in reply frame: {e}")
+        line = f"{module}{Dialect.Operator.RESPONSE.value}{self.STATUSES[status]}{Dialect.Operator.REQUEST.value}"
+        line += "|".join(values)
+        if request_id != self.NO_REQUEST_ID:
+            line += f"{Dialect.Operator.REQUEST_ID.value}{request_id}"
+        return line
+
+    def _pack(self, value: Any) -> bytes:
+        if isinstance(value, bool):
+            return b"b" + self._PACKERS[ord("b")].pack(value)
+        if isinstance(value, int) and -(1 << 31) <= value < (1 << 31):
+            return b"i" + self._PACKERS[ord("i")].pack(value)
+        if isinstance(value, float):
+            return b"f" + self._PACKERS[ord("f")].pack(value)
+        encoded = str(value).encode("utf-8")
+        if len(encoded) > 0xFF:
+            raise ValueError(f"Argument exceeds 255 bytes: '{value}'")
+        return b"s" + bytes([len(encoded)]) + encoded
+
+    def _unpack(self, data: memoryview) -> list[str]:
+        values = []
+        index = 0
+        while index < len(data):
+            tag = data[index]
+            index += 1
+            if tag == ord("s"):
+                length = data[index]
+                values.append(str(data[index + 1:index + 1 + length], "utf-8", "replace"))
+                index += 1 + length
+                continue
+            packer = self._PACKERS.get(tag)
+            if packer is None:
+                raise ValueError(f"Unknown value tag: {tag:#04x}")
+            (value,) = packer.unpack_from(data, index)
+            index += packer.size
+            if tag == ord("b"):
+                values.append(str(bool(value)))
+            elif tag == ord("f"):
+                values.append(f"{value:.7g}")  # float32 carries about 7 significant digits
+            else:
+                values.append(str(value))
+        return values
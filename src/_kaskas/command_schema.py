@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Optional
+
+from _kaskas.log import log
+
+
+def _decode_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ("true", "1", "on", "yes"):
+        return True
+    if lowered in ("false", "0", "off", "no"):
+        return False
+    raise ValueError(f"not a bool: '{value}'")
+
+
+# types that may appear in the usage output, by the name the schema stores them under
+DECODERS: dict[str, Any] = {
+    "bool": _decode_bool,
+    "int": int,
+    "float": float,
+    "str": str,
+}
+TYPE_ALIASES: dict[str, str] = {
+    "bool": "bool", "boolean": "bool",
+    "int": "int", "integer": "int", "uint": "int", "long": "int", "ulong": "int",
+    "float": "float", "double": "float", "real": "float",
+    "str": "str", "string": "str", "text": "str", "char*": "str",
+}
+
+
+class Argument:
+    """ A typed argument of a command, as listed in the usage output """
+
+    __slots__ = ("name", "type", "optional")
+
+    name: str
+    type: str
+    optional: bool
+
+    def __init__(self, name: str, type: str, optional: bool = False) -> None:
+        self.name = name
+        self.type = type
+        self.optional = optional
+
+
+class CommandSpec:
+    """ The arguments and return values of a single command, None where the usage output does not tell """
+
+    __slots__ = ("module", "command", "arguments", "returns")
+
+    module: str
+    command: str
+    arguments: Optional[list[Argument]]
+    returns: Optional[list[str]]
+
+    def __init__(self, module: str, command: str, arguments: Optional[list[Argument]] = None,
+                 returns: Optional[list[str]] = None) -> None:
+        self.module = module
+        self.command = command
+        self.arguments = arguments
+        self.returns = returns
+
+    def as_dict(self) -> dict:
+        return {
+            "arguments": None if self.arguments is None else [
+                {"name": argument.name, "type": argument.type, "optional": argument.optional}
+                for argument in self.arguments],
+            "returns": self.returns,
+        }
+
+    @staticmethod
+    def from_dict(module: str, command: str, d: dict) -> "CommandSpec":
+        arguments = d.get("arguments")
+        return CommandSpec(
+            module, command,
+            arguments=None if arguments is None else [Argument(**argument) for argument in arguments],
+            returns=d.get("returns"),
+        )
+
+
+class CommandSchema:
+    """ Index of the modules and commands of a firmware, parsed from the output of a usage ('?') request.
+
+    Lines of the usage output that look like a command declaration are indexed, all other lines are ignored:
+
+        version: 1.4.0                             the firmware version, which keys the persisted schema
+        Fluids:waterNow(ml: float) -> bool         a command with its arguments and return values
+        Fluids                                     a module header, followed by its indented commands
+          isOutOfWater -> bool
+          timeSinceLastDosis(unit?: str) -> float
+
+    Commands below a module header need an argument list, return types or indentation to tell them from the next
+    header. Arguments are 'name: type' or just 'type', a trailing '?' marks them optional. Commands without an argument
+    list are not validated, and neither are commands or modules the schema does not know. Commands without return
+    types have their reply values decoded by inference.
+    """
+
+    VERSION_LINE = re.compile(r"^\s*(?:firmware\s*)?version\s*[:=]?\s*(?P<version>[\w.+-]+)\s*$", re.IGNORECASE)
+    COMMAND_LINE = re.compile(
+        r"^(?P<indent>\s*)(?:(?P<module>[A-Za-z_]\w*):)?(?P<command>[A-Za-z_]\w*)\s*:?\s*"
+        r"(?:\((?P<arguments>[^)]*)\))?\s*(?:->\s*(?P<returns>[^#]*?))?\s*(?:#.*)?$")
+
+    version: Optional[str]
+    usage: str
+    _commands: dict[str, dict[str, CommandSpec]]
+
+    def __init__(self, usage: str, version: Optional[str] = None,
+                 commands: Optional[dict[str, dict[str, CommandSpec]]] = None) -> None:
+        self.usage = usage
+        self.version = version
+        self._commands = {} if commands is None else commands
+
+    @property
+    def key(self) -> str:
+        """ Identifies the firmware: its version, or a hash of its usage output when it does not report one """
+        if self.version:
+            return re.sub(r"[^\w.+-]", "_", self.version)
+        return hashlib.sha1(self.usage.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def parse(usage: str) -> "CommandSchema":
+        version = None
+        commands: dict[str, dict[str, CommandSpec]] = {}
+        module = None
+        for line in usage.splitlines():
+            if not line.strip():
+                continue
+            if version is None and (match := CommandSchema.VERSION_LINE.match(line)):
+                version = match["version"]
+                continue
+            match = CommandSchema.COMMAND_LINE.match(line)
+            if match is None:
+                continue
+            declares_command = match["module"] or match["arguments"] is not None or match["returns"] is not None
+            if not match["indent"] and not declares_command:
+                module = match["command"]  # a module header
+                commands.setdefault(module, {})
+                continue
+            spec_module = match["module"] or module
+            if spec_module is None:
+                continue
+            commands.setdefault(spec_module, {})[match["command"]] = CommandSpec(
+                spec_module, match["command"],
+                arguments=CommandSchema._parse_arguments(match["arguments"]),
+                returns=CommandSchema._parse_returns(match["returns"]),
+            )
+        return CommandSchema(usage, version=version, commands=commands)
+
+    def spec_for(self, module: str, command: Optional[str]) -> Optional[CommandSpec]:
+        return self._commands.get(module, {}).get(command)
+
+    def validate(self, module: str, command: Optional[str], args: Optional[list[str]]) -> Optional[str]:
+        """ The reason why the firmware would reject this request, or None when it looks valid or is unknown
+
+        Usage lines that the parser does not understand are skipped, so a command missing from the schema may well
+        exist: it is left for the firmware to judge.
+        """
+        spec = self.spec_for(module, command)
+        if spec is None or spec.arguments is None:
+            return None
+
+        args = list(args) if args else []
+        while args and args[-1] == "":
+            args.pop()
+        required = sum(1 for argument in spec.arguments if not argument.optional)
+        if not required <= len(args) <= len(spec.arguments):
+            expected = f"{required}" if required == len(spec.arguments) else f"{required} to {len(spec.arguments)}"
+            return f"'{module}:{command}' takes {expected} argument(s), got {len(args)}"
+        for argument, value in zip(spec.arguments, args):
+            try:
+                DECODERS[argument.type](value)
+            except ValueError:
+                return f"'{module}:{command}' argument '{argument.name}' must be {argument.type}, got '{value}'"
+        return None
+
+    def decode(self, module: str, command: Optional[str], values: Optional[list[str]]) -> Optional[list[Any]]:
+        """ The reply values converted to the return types of the command, or to the most specific type they fit """
+        if values is None:
+            return None
+        spec = self.spec_for(module, command)
+        types = spec.returns if spec is not None and spec.returns else []
+        return [decode_value(value, types[index] if index < len(types) else None)
+                for index, value in enumerate(values)]
+
+    def as_dict(self) -> dict[str, dict[str, dict]]:
+        return {module: {command: spec.as_dict() for command, spec in commands.items()}
+                for module, commands in self._commands.items()}
+
+    def save(self, directory: Path) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.key}.json"
+        with open(path, "w") as f:
+            json.dump({"version": self.version, "usage": self.usage, "commands": self.as_dict()}, f, indent=2)
+        return path
+
+    @staticmethod
+    def load(path: Path) -> "CommandSchema":
+        with open(path, "r") as f:
+            d = json.load(f)
+        commands = {module: {command: CommandSpec.from_dict(module, command, spec) for command, spec in specs.items()}
+                    for module, specs in d["commands"].items()}
+        return CommandSchema(d["usage"], version=d.get("version"), commands=commands)
+
+    @staticmethod
+    def load_latest(directory: Path) -> Optional["CommandSchema"]:
+        """ The schema that was persisted or used last, if any """
+        candidates = sorted(directory.glob("*.json"), key=os.path.getmtime, reverse=True) if directory.is_dir() else []
+        for path in candidates:
+            try:
+                return CommandSchema.load(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                log.warning(f"Schema: ignoring unreadable schema {path}: {e}")
+        return None
+
+    @staticmethod
+    def _parse_arguments(arguments: Optional[str]) -> Optional[list[Argument]]:
+        if arguments is None:
+            return None
+        parsed = []
+        for index, argument in enumerate(part.strip() for part in re.split(r"[,|]", arguments)):
+            if not argument:
+                continue
+            optional = argument.startswith("[") or "?" in argument
+            argument = argument.strip("[]").replace("?", "")
+            name, _, type_name = argument.rpartition(":")
+            parsed.append(Argument(name.strip() or f"arg{index}", _canonical_type(type_name), optional))
+        return parsed
+
+    @staticmethod
+    def _parse_returns(returns: Optional[str]) -> Optional[list[str]]:
+        if returns is None or not returns.strip():
+            return None
+        return [_canonical_type(part) for part in re.split(r"[,|]", returns) if part.strip()]
+
+
+def _canonical_type(name: str) -> str:
+    return TYPE_ALIASES.get(name.strip().lower(), "str")
+
+
+def decode_value(value: str, type_name: Optional[str] = None) -> Any:
+    """ Decode a value as type_name, or as the most specific of bool, int and float that fits when it is None """
+    if type_name is not None:
+        try:
+            return DECODERS[type_name](value)
+        except ValueError:
+            return value
+    if value in ("True", "False", "true", "false"):
+        return value.lower() == "true"
+    for decoder in (int, float):
+        try:
+            return decoder(value)
+        except ValueError:
+            pass
+    return value
@@ -1,5 +1,6 @@
 from typing import *
 from pathlib import Path
+import socket
 import Pyro5.api
 import Pyro5.nameserver
 
@@ -8,6 +9,9 @@ from _kaskas.datacollector import TimeSeriesCollector
 from _kaskas.kaskas_api import KasKasAPI
 from _kaskas.pyro_server import PyroServer
 from _kaskas.datalink_serial import Datalink as DatalinkSerial
+from _kaskas.datalink_process import DatalinkProcess
+from _kaskas.device_registry import DeviceRegistry
+from _kaskas.utils.proxy_pool import PooledProxy, ProxyPool
 
 
 class Daemon:
@@ -16,62 +20,141 @@ class Daemon:
     _root_dir: Path
 
     _pyro_server: PyroServer
+    _proxies: ProxyPool
 
     _api_address: str
-    _datalink: Optional[DatalinkSerial] = None
+    _remote_host: Optional[str] = None
+    _api_endpoints: list[tuple[Path, str]]  # the directory and Pyro name of every API
+    _local_apis: dict[str, KasKasAPI]  # the APIs served by this process, by Pyro name and alias
+    _registry: Optional[DeviceRegistry] = None
+    _datalink: Optional[DatalinkSerial | DatalinkProcess] = None
     _webapp: Optional[StreamlitLauncher] = None
-    _collector: Optional[TimeSeriesCollector] = None
+    _collectors: list[TimeSeriesCollector]
 
     def __init__(self, root: Path) -> None:
         self._root_dir = root
         self._pyro_server = PyroServer()
-
-    def launch_api(self, remote: bool = False, remote_host: Optional[str] = None) -> None:
-
+        self._proxies = ProxyPool()
+        self._api_endpoints = []
+        self._local_apis = {}
+        self._collectors = []
+
+    def launch_api(self, remote: bool = False, remote_host: Optional[str] = None,
+                   isolated_datalink: bool = False, server_type: str = "multiplex", workers: int = 16,
+                   max_pending: Optional[int] = None, unix_socket: bool = True) -> None:
+        """ Serve an API for every attached controller as 'kaskas.api.<device>', the first one also as 'kaskas.api'
+
+        When no controller answers at launch, a single API is served as 'kaskas.api' from the user directory, which
+        keeps looking for a controller in the background. With isolated_datalink, serial I/O runs in a process of
+        its own for every controller. See PyroServer for server_type and workers; an API answers requests beyond
+        max_pending waiting for its controller with BUSY. With unix_socket, the APIs are also served on the Unix domain
+        socket `root/kaskas.sock` for clients on this host.
+        """
         if not remote:
             if not self._pyro_server.is_started:
+                self._pyro_server.close()  # serve with the requested server type instead
+                self._pyro_server = PyroServer(server_type=server_type, workers=workers,
+                                               unix_socket=self.unix_socket if unix_socket and hasattr(socket, "AF_UNIX")
+                                               else None)
                 self._pyro_server.start()
-            self._datalink = DatalinkSerial(root=self._root_dir)
-            self._pyro_server.serve_object(KasKasAPI(datalink=self._datalink), KasKasAPI.cannonical_name())
-
-        self._api_address = f"PYRONAME:{KasKasAPI.cannonical_name()}"
+            self._registry = DeviceRegistry(self._root_dir, api_options=dict(max_pending=max_pending),
+                                            isolated=isolated_datalink)
+            devices = self._registry.discover()
+            for index, device in enumerate(devices):
+                aliases = [KasKasAPI.cannonical_name()] if index == 0 else []
+                self._pyro_server.serve_object(device.api, device.api_name, aliases=aliases)
+                self._api_endpoints.append((device.root, device.api_name))
+                self._local_apis.update({name: device.api for name in (device.api_name, *aliases)})
+            if not devices:
+                self._datalink = DatalinkProcess(root=self._root_dir) if isolated_datalink \
+                    else DatalinkSerial(root=self._root_dir)
+                api = KasKasAPI(datalink=self._datalink, schema_dir=self._root_dir / DeviceRegistry.SCHEMA_DIRNAME,
+                                max_pending=max_pending)
+                self._pyro_server.serve_object(api, KasKasAPI.cannonical_name())
+                self._api_endpoints.append((self._root_dir, KasKasAPI.cannonical_name()))
+                self._local_apis[KasKasAPI.cannonical_name()] = api
+        else:
+            self._api_endpoints.append((self._root_dir, KasKasAPI.cannonical_name()))
+
+        self._api_address = self._address_of(self._api_endpoints[0][1])
+        self._remote_host = remote_host
 
         if remote_host:
             self._api_address += f"@{remote_host}"
 
     def launch_webapp(self):
-        self._webapp = StreamlitLauncher(root=self._root_dir, api=self.api)
+        root, name = self._api_endpoints[0]
+        self._webapp = StreamlitLauncher(root=root, api=self.api, api_name=name,
+                                         api_socket=self.unix_socket if self.unix_socket.exists() else None)
         self._webapp.start()
 
     def launch_collector(self, sampling_interval: int = 10):
-        self._collector = TimeSeriesCollector(root=self._root_dir, api=self.api, sampling_interval=sampling_interval)
-        self._collector.start()
+        """ Collect the timeseries of every API into its own directory """
+        for root, name in self._api_endpoints:
+            collector = TimeSeriesCollector(root=root, api=self.api_for(name), sampling_interval=sampling_interval)
+            collector.start()
+            self._collectors.append(collector)
 
     def wait(self) -> None:
         # self._pyro_server.wait()
-        if self._datalink:
-            self._datalink.wait()
-        if self._collector:
-            self._collector.wait()
+        for datalink in self._datalinks:
+            datalink.wait()
+        for collector in self._collectors:
+            collector.wait()
         if self._webapp:
             self._webapp.wait()
 
     def shutdown(self, wait: bool = True) -> None:
-        if self._datalink:
-            self._datalink.stop()
+        for datalink in self._datalinks:
+            datalink.stop()
         if self._webapp:
             self._webapp.stop()
-        if self._collector:
-            self._collector.stop()
+        for collector in self._collectors:
+            collector.stop()
         if wait:
             self.wait()
         self._pyro_server.stop(blocking=wait)
 
     @property
-    def api(self) -> KasKasAPI | Pyro5.api.Proxy:
+    def api(self) -> KasKasAPI | PooledProxy:
+        """ The first API; see api_for """
         assert self._pyro_server, "Pyro server is not initialized"
         assert self._api_address, "Api is not initialized"
-        return self._pyro_server.proxy_for(self._api_address)
+        return self.api_for(self._api_endpoints[0][1])
+
+    def api_for(self, name: str) -> KasKasAPI | PooledProxy:
+        """ The API itself when it is served by this process, which spares every call the trip through Pyro,
+        otherwise a pooled proxy to it """
+        if name in self._local_apis:
+            return self._local_apis[name]
+        # a daemon on this host is reached over its socket without nameserver, unless it left a stale socket behind
+        if not self._remote_host and PyroServer.is_serving(self.unix_socket):
+            return self._proxies.handle(PyroServer.unix_address(self.unix_socket, name))
+        address = self._address_of(name)
+        if self._remote_host:
+            address += f"@{self._remote_host}"
+        return self._proxies.handle(address)
+
+    def proxy_statistics(self) -> dict[str, int]:
+        """ Connection reuse and name resolution counters of the proxies handed out by api and api_for """
+        return self._proxies.statistics()
+
+    @property
+    def unix_socket(self) -> Path:
+        return self._root_dir / PyroServer.SOCKET_FILENAME
+
+    @property
+    def api_names(self) -> list[str]:
+        return [name for _, name in self._api_endpoints]
+
+    @property
+    def _datalinks(self) -> list[DatalinkSerial | DatalinkProcess]:
+        datalinks = [device.datalink for device in self._registry.devices] if self._registry else []
+        return datalinks + ([self._datalink] if self._datalink else [])
+
+    @staticmethod
+    def _address_of(name: str) -> str:
+        return f"PYRONAME:{name}"
 
     @property
     def root_dir(self) -> Path:
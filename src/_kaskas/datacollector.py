@@ -13,6 +13,7 @@ import Pyro5.api
 import Pyro5.nameserver
 
 from _kaskas.kaskas_api import KasKasAPI
+from _kaskas.request_scheduler import Priority
 from _kaskas.utils.filelock import FileLock
 
 from rich.progress import open as rich_open
@@ -92,7 +93,8 @@ class TimeSeriesCollector:
                 writer = csv.writer(file)
 
             log.debug("Setting up timeseries collection")
-            columns_response = self._api.request(module="DAQ", command="getTimeSeriesColumns")
+            columns_response = self._api.request(module="DAQ", command="getTimeSeriesColumns",
+                                                 priority=Priority.BACKGROUND)
             if not columns_response or not all(
                     [
                         str.isalpha(s) and str.isupper(s)
@@ -120,14 +122,16 @@ class TimeSeriesCollector:
                     return
 
             log.debug("Starting timeseries collection loop")
-            while timeseries_response := self._api.request(module="DAQ", command="getTimeSeries"):
+            while timeseries_response := self._api.request(module="DAQ", command="getTimeSeries",
+                                                           priority=Priority.BACKGROUND):
                 collect_to(timeseries_response.arguments, writer)
                 file.flush()
                 time.sleep(self._sampling_interval)
         log.debug("Timeseries collection came to a halt")
 
     def _runner(self):
-        self._api._pyroClaimOwnership()  # https://pyro5.readthedocs.io/en/latest/clientcode.html#proxy-sharing-between-threads
+        if hasattr(self._api, "_pyroClaimOwnership"):  # a pooled proxy connects per thread and needs no claim
+            self._api._pyroClaimOwnership()  # https://pyro5.readthedocs.io/en/latest/clientcode.html#proxy-sharing-between-threads
 
         while not self._flag_shutdown.is_set():
             self._flag_up_and_running.set()
@@ -0,0 +1,197 @@
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import count
+from multiprocessing.connection import Connection
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from _kaskas.binary_dialect import BinaryDialect
+from _kaskas.datalink_serial import Datalink
+from _kaskas.log import log
+from _kaskas.request_scheduler import OutgoingRequest, Priority
+
+
+def _serve(connection: Connection, root: Path, options: dict) -> None:
+    """ Entry point of the datalink process: runs a Datalink and relays between it and the connection """
+    datalink = Datalink(root=root, **options)
+    send_lock = Lock()
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            connection.send(message)
+
+    datalink.set_api_line_handler(lambda line: send(("line", line)))
+    datalink.set_connection_handler(lambda connected: send(("connected", connected)))
+    datalink.start()
+    send(("up", datalink.is_connected))
+
+    try:
+        while True:
+            message = connection.recv()
+            if message[0] == "submit":
+                datalink.submit([
+                    OutgoingRequest(line, priority=Priority(priority), deadline=deadline,
+                                    on_sent=lambda token=token: send(("sent", token)),
+                                    on_expired=lambda token=token: send(("expired", token)))
+                    for token, line, priority, deadline in message[1]
+                ])
+            elif message[0] == "logs":
+                token, since, limit = message[1:]
+                send(("logs", (token, datalink.recent_logs(since=since, limit=limit))))
+            elif message[0] == "binary":
+                datalink.set_binary_dialect(BinaryDialect(message[1]) if message[1] is not None else None)
+            elif message[0] == "stop":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass  # the daemon went away
+    finally:
+        datalink.stop(blocking=True)
+
+
+class DatalinkProcess:
+    """ Drop-in for Datalink that runs it in a process of its own, so that serial I/O never waits for the GIL.
+
+    Requests travel to the process over a pipe, tagged with a token; the process reports back per token when the
+    request was written to the port or expired, and forwards every API line. The callbacks of a request therefore
+    still run in this process, on the thread that receives from the pipe. The port is always discovered by the
+    process itself, either any controller or the given device.
+    """
+
+    _root: Path
+    _options: dict
+
+    _process: multiprocessing.Process
+    _connection: Connection
+    _child_connection: Connection
+    _send_lock: Lock
+    _receiver: Thread
+    _flag_up_and_running: Event
+
+    _tokens: count
+    _waiting: dict[int, OutgoingRequest]
+    _queries: dict[int, Future]
+    _connected: bool
+    _api_line_handler: Optional[Callable[[str], None]]
+    _connection_handler: Optional[Callable[[bool], None]]
+
+    def __init__(self, root: Path, io_timeout: float = 0.1, window: int = 4, window_bytes: int = 128,
+                 ack_timeout: float = 3.0, device: Optional[str] = None):
+        self._root = root
+        self._options = dict(io_timeout=io_timeout, window=window, window_bytes=window_bytes,
+                             ack_timeout=ack_timeout, device=device)
+        context = multiprocessing.get_context("spawn")  # forking a process with running threads is not safe
+        self._connection, self._child_connection = context.Pipe()
+        self._process = context.Process(target=_serve, args=(self._child_connection, root, self._options),
+                                        name=f"kaskas-datalink-{root.name}", daemon=True)
+        self._send_lock = Lock()
+        self._receiver = Thread(target=self._receive)
+        self._flag_up_and_running = Event()
+        self._tokens = count()
+        self._waiting = {}
+        self._queries = {}
+        self._connected = False
+        self._api_line_handler = None
+        self._connection_handler = None
+
+    def write_line(self, line: str, priority: Priority = Priority.INTERACTIVE):
+        self.write_lines([line], priority=priority)
+
+    def write_lines(self, lines: list[str], priority: Priority = Priority.INTERACTIVE):
+        self.submit([OutgoingRequest(line.encode("utf-8"), priority) for line in lines])
+
+    def submit(self, requests: list[OutgoingRequest]):
+        batch = []
+        for request in requests:
+            token = next(self._tokens)
+            self._waiting[token] = request
+            batch.append((token, request.line, int(request.priority), request.deadline))
+        self._send(("submit", batch))
+
+    def set_api_line_handler(self, handler: Optional[Callable[[str], None]]):
+        self._api_line_handler = handler
+
+    def set_connection_handler(self, handler: Optional[Callable[[bool], None]]):
+        """ Tell handler, on the receiving thread, whenever the process loses the serial port or finds it again """
+        self._connection_handler = handler
+
+    def set_binary_dialect(self, dialect: Optional[BinaryDialect]):
+        self._send(("binary", dialect.command_ids if dialect is not None else None))
+
+    def recent_logs(self, since: Optional[int] = None, limit: int = 100, timeout: float = 1.0) -> list[dict]:
+        """ The last firmware log and debug lines as kept by the process, empty when it does not answer in time """
+        token = next(self._tokens)
+        self._queries[token] = future = Future()
+        try:
+            self._send(("logs", token, since, limit))
+            return future.result(timeout=timeout)
+        except (OSError, ValueError, FutureTimeoutError):
+            return []
+        finally:
+            self._queries.pop(token, None)
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    @property
+    def is_started(self) -> bool:
+        return self._process.is_alive()
+
+    @property
+    def is_up_and_running(self) -> bool:
+        return self._flag_up_and_running.is_set()
+
+    def start(self, wait: bool = True):
+        if not self._process.is_alive() and self._process.exitcode is None:
+            self._process.start()
+            self._child_connection.close()  # so that we notice when the process ends
+            self._receiver.start()
+        if wait:
+            self._flag_up_and_running.wait()
+
+    def stop(self, blocking: bool = False):
+        try:
+            self._send(("stop",))
+        except (OSError, ValueError):
+            pass  # the process is gone already
+        if blocking:
+            self.wait()
+
+    def wait(self):
+        if self._process.is_alive():
+            self._process.join()
+        if self._receiver.is_alive():
+            self._receiver.join()
+
+    def _send(self, message: tuple) -> None:
+        with self._send_lock:
+            self._connection.send(message)
+
+    def _receive(self):
+        while True:
+            try:
+                kind, payload = self._connection.recv()
+            except (EOFError, OSError):
+                break
+            if kind == "line":
+                if self._api_line_handler is not None:
+                    self._api_line_handler(payload)
+            elif kind in ("sent", "expired"):
+                request = self._waiting.pop(payload, None)
+                callback = request and (request.on_sent if kind == "sent" else request.on_expired)
+                if callback is not None:
+                    callback()
+            elif kind == "logs":
+                token, records = payload
+                future = self._queries.get(token)
+                if future is not None:
+                    future.set_result(records)
+            elif kind in ("up", "connected"):
+                self._connected = payload
+                self._flag_up_and_running.set()
+                if kind == "connected" and self._connection_handler is not None:
+                    self._connection_handler(payload)
+        self._connected = False
+        self._flag_up_and_running.set()  # never leave a start(wait=True) hanging on a process that died
+        log.debug(f"DatalinkProcess: process for {self._root} has ended")
@@ -1,22 +1,28 @@
 import logging
 import os
+import selectors
+import socket
 import time
-from datetime import datetime
+from collections import deque
 from enum import Enum, Flag, auto
 from io import RawIOBase
-from multiprocessing import Lock as createLock, Queue
-from multiprocessing.synchronize import Lock
 from pathlib import Path
 from queue import Empty as QueueEmpty
-from threading import Event, Thread
-from typing import Optional, TextIO
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
 
 from serial import SerialException, SerialTimeoutException
 
+from _kaskas.binary_dialect import BinaryDialect
 from _kaskas.dialect import Dialect
 from _kaskas.log import log
+from _kaskas.request_scheduler import OutgoingRequest, Priority, RequestScheduler
 from _kaskas.utils.filelock import FileLock
-from _kaskas.utils.io_serial import open_next_available_serial
+from _kaskas.utils.io_serial import SerialPortBinding, open_next_available_serial, open_serial_device
+from _kaskas.utils.line_framer import LineFramer
+from _kaskas.utils.local_queue import LocalQueue
+from _kaskas.utils.log_pipeline import (BoundedQueueHandler, ForwardingHandler, GroupCommitFileHandler, LogListener,
+                                       LogRingBuffer)
 
 
 class Datalink:
@@ -26,40 +32,136 @@ class Datalink:
     _flag_up_and_running: Event
     _thread: Thread
 
-    _io_handle: RawIOBase
-
-    _outgoing: Queue
-    _incoming_api: Queue
+    _io_handle: Optional[RawIOBase]
+
+    READ_CHUNK_SIZE = 4096
+
+    # port discovery: every candidate port is asked for its usage, which every firmware answers, and the first to reply
+    # in the KasKas dialect is used
+    IDENTIFICATION_PROBE = Dialect.format_request(Dialect.Operator.REQUEST_PRINT_USAGE.value, None).encode("utf-8")
+    IDENTIFICATION_REPLY_PREFIX = Dialect.HEADER_API.encode("utf-8")
+    USAGE_REQUEST = Dialect.Operator.REQUEST_PRINT_USAGE.value.encode("utf-8")
+    USAGE_REPLY = f"{Dialect.Operator.REQUEST_PRINT_USAGE.value}{Dialect.Operator.RESPONSE.value}"
+    RECONNECT_DELAY = 0.5
+    RECONNECT_DELAY_MAX = 30.0
+    LOG_QUEUE_SIZE = 4096
+    RECENT_LOGS = 2048
+
+    _device: Optional[str]
+    _rediscover: bool
+    _binding: Optional[SerialPortBinding]
+    _reconnector: Optional[Thread]
+    _reconnected_io: Optional[RawIOBase]
+
+    _selector: selectors.BaseSelector
+    _wakeup_r: socket.socket
+    _wakeup_w: socket.socket
+
+    _lock: Lock
+    _outgoing: RequestScheduler
+    _in_flight: deque[int]
+    _in_flight_bytes: int
+    _usage_requests: int  # usage requests written and not answered yet, to tell late replies to the probe apart
+    _last_ack: float
+    _incoming_api: LocalQueue[str]
     _incoming_api_remainder: Optional[list[str]]
+    _api_line_handler: Optional[Callable[[str], None]]
+    _connection_handler: Optional[Callable[[bool], None]]
+
+    _framer: LineFramer
+    _binary: Optional[BinaryDialect]
+    _line_handlers: dict[int, Callable[[str], None]]
 
-    _log_file: TextIO
+    # firmware log and debug lines are queued by the I/O thread and written to file and terminal by a listener thread
+    _log_queue: BoundedQueueHandler
+    _log_file: GroupCommitFileHandler
+    _log_recent: LogRingBuffer
+    _log_listener: LogListener
 
     _filelock: FileLock
 
-    def __init__(self, root: Path, io: RawIOBase = None, io_timeout: float = 0.1):
+    def __init__(self, root: Path, io: RawIOBase = None, io_timeout: float = 0.1, window: int = 4,
+                 window_bytes: int = 128, ack_timeout: float = 3.0, device: Optional[str] = None):
         self._flag_shutdown = Event()
         self._flag_up_and_running = Event()
         self._thread = Thread(target=self._runner)
         self._io_handle = io
         self._io_timeout = io_timeout
-        self._outgoing = Queue()
-        self._incoming_api = Queue()
+        # without io we discover the port ourselves, with a device we look for that device only when io fails
+        self._device = device
+        self._rediscover = io is None or device is not None
+        self._binding = SerialPortBinding(root / "serial.toml") if io is None and device is None else None
+        self._reconnector = None
+        self._reconnected_io = None
+        self._outgoing = RequestScheduler()
+
+        # flow control: at most `window` requests, together at most `window_bytes` long, are unanswered at any time
+        self._window = window
+        self._window_bytes = window_bytes
+        self._ack_timeout = ack_timeout
+        self._in_flight = deque()
+        self._in_flight_bytes = 0
+        self._usage_requests = 0
+        self._last_ack = time.monotonic()
+        self._incoming_api = LocalQueue()
         self._incoming_api_remainder = None
-        self._log_file = open(root / "kaskas.log", mode="a+")
+        self._api_line_handler = None
+        self._connection_handler = None
+        self._framer = LineFramer()
+        self._binary = None
+        self._line_handlers = {
+            Dialect.HEADER_API_BYTE: self._handle_api_line,
+            Dialect.HEADER_LOG_BYTE: self._handle_log_line,
+            Dialect.HEADER_DEBUG_BYTE: self._handle_debug_line,
+        }
+        self._log_queue = BoundedQueueHandler(maxsize=self.LOG_QUEUE_SIZE)
+        self._log_file = GroupCommitFileHandler(root / "kaskas.log")
+        self._log_file.setLevel(logging.DEBUG if log.isEnabledFor(logging.DEBUG) else logging.INFO)
+        self._log_recent = LogRingBuffer(capacity=self.RECENT_LOGS)
+        self._log_listener = LogListener(self._log_queue, [self._log_file, self._log_recent, ForwardingHandler(log)])
         self._filelock = FileLock(root / "kaskas.lock")
 
         if not self._filelock.acquire(timeout=0.1):
             raise RuntimeError("KasKas API was already locked!")
 
-        self._lock = createLock()
-        os.set_blocking(self._io.fileno(), False)  # Ensure IO is non-blocking
+        self._lock = Lock()
+        if self._io_handle is None:
+            self._io_handle = self._open_serial()
+        if self._io_handle is not None:
+            os.set_blocking(self._io_handle.fileno(), False)  # Ensure IO is non-blocking
+
+        # the I/O thread sleeps in the selector until the serial port is readable or it is woken up via this socketpair
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
 
     # def __del__(self):
     #     self._filelock.release()
 
-    def write_line(self, line: str):
+    def write_line(self, line: str, priority: Priority = Priority.INTERACTIVE):
+        self.write_lines([line], priority=priority)
+
+    def write_lines(self, lines: list[str], priority: Priority = Priority.INTERACTIVE):
+        self.submit([OutgoingRequest(line.encode("utf-8"), priority) for line in lines])
+
+    def submit(self, requests: list[OutgoingRequest]):
         with self._lock:
-            self._outgoing.put(line.encode("utf-8"))
+            for request in requests:
+                self._outgoing.put(request)
+        self._wakeup()
+
+    def set_api_line_handler(self, handler: Optional[Callable[[str], None]]):
+        """ Deliver complete API lines to handler on the I/O thread instead of queueing them for next_api_line """
+        self._api_line_handler = handler
+
+    def set_connection_handler(self, handler: Optional[Callable[[bool], None]]):
+        """ Tell handler, on the I/O thread, whenever the serial port is lost or found again """
+        self._connection_handler = handler
+
+    def set_binary_dialect(self, dialect: Optional[BinaryDialect]):
+        """ Accept API replies as binary frames of the negotiated dialect, next to text lines """
+        self._binary = dialect
 
     def next_api_line(self, timeout: float = None) -> Optional[str]:
         try:
@@ -69,78 +171,207 @@ class Datalink:
 
     @property
     def is_connected(self) -> bool:
-        return self._io is not None
+        return self._io_handle is not None
+
+    @property
+    def log_statistics(self) -> dict[str, int]:
+        """ Firmware log lines queued and dropped, and how often the log file was flushed and rotated """
+        return dict(queued=self._log_queue.enqueued, dropped=self._log_queue.dropped,
+                    flushes=self._log_file.flushes, rotations=self._log_file.rotations)
+
+    def recent_logs(self, since: Optional[int] = None, limit: int = 100) -> list[dict]:
+        """ The last firmware log and debug lines, see LogRingBuffer.records """
+        return self._log_recent.records(since=since, limit=limit)
 
     def _runner(self):
+        self._log_listener.start()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+        if self.is_connected:
+            self._selector.register(self._io.fileno(), selectors.EVENT_READ)
+        else:
+            self._start_reconnector()
+
         self._flag_up_and_running.set()
         while not self._flag_shutdown.is_set():
             try:
-                self._process_incoming()
+                for key, _ in self._selector.select(timeout=self._select_timeout()):
+                    if key.fileobj is self._wakeup_r:
+                        self._drain_wakeup()
+                    else:
+                        self._process_incoming()
+                self._attach_reconnected()
+                self._reclaim_unacknowledged()
                 self._process_outgoing()
             except SerialTimeoutException:
                 log.exception("Serial timeout occurred")
 
-    def _process_outgoing(self):
-        if self._incoming_api_remainder:
-            return  # Wait until the remainder has been fully read
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        self._log_listener.stop()
 
+    def _wakeup(self):
         try:
-            while outgoing := self._outgoing.get(block=False):
-                self._io.write(outgoing)
-                self._io.flush()
-                time.sleep(self._io_timeout)
-        except QueueEmpty:
+            self._wakeup_w.send(b"\0")
+        except BlockingIOError:
+            pass  # the socket buffer is full, so a wakeup is pending already
+        except OSError:
+            pass  # the I/O thread has shut down
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_r.recv(512):
+                pass
+        except BlockingIOError:
             pass
 
-    def _process_incoming(self):
-        for line in self._read_lines():
-            if line.startswith(Dialect.HEADER_LOG):
-                self._handle_log_line(line[1:])
-            elif line.startswith(Dialect.HEADER_API):
-                self._handle_api_line(line[1:])
-            elif line.startswith(Dialect.HEADER_DEBUG):
-                self._handle_debug_line(line[1:])
-            else:
-                self._handle_unknown_line(line)
+    def _process_outgoing(self):
+        for expired in self._outgoing.drop_expired(time.monotonic()):
+            log.debug(f"Datalink: dropping expired request: {expired.line}")
+            if expired.on_expired is not None:
+                expired.on_expired()
+
+        if not self.is_connected:
+            return  # requests wait for the reconnect, or expire
+
+        batch = []
+        batch_size = 0
+        while (outgoing := self._outgoing.peek()) is not None:
+            if not self._has_credit_for(len(batch), batch_size + len(outgoing.line)):
+                break  # wait for an acknowledgement before sending it
+            outgoing = self._outgoing.pop()
+            batch.append(outgoing)
+            batch_size += len(outgoing.line)
+
+        if not batch:
+            return
+
+        if not self._in_flight:
+            self._last_ack = time.monotonic()  # the acknowledgement timeout runs from the first unanswered request
+        self._in_flight.extend(len(outgoing.line) for outgoing in batch)
+        self._in_flight_bytes += batch_size
+        self._usage_requests += sum(1 for outgoing in batch if outgoing.line.startswith(self.USAGE_REQUEST))
+
+        for outgoing in batch:
+            if outgoing.on_sent is not None:
+                outgoing.on_sent()
+        try:
+            self._io.write(b"".join(outgoing.line for outgoing in batch))  # coalesce all the window allows into one write
+            self._io.flush()
+        except (OSError, SerialException) as e:
+            log.error(f"Datalink: failed to write to serial port: {e}")
+            self._detach()
+
+    def _has_credit_for(self, batch_length: int, batch_size: int) -> bool:
+        if not self._in_flight and batch_length == 0:
+            return True  # an idle link always accepts a request, however long it is
+        return (len(self._in_flight) + batch_length < self._window
+                and self._in_flight_bytes + batch_size <= self._window_bytes)
+
+    def _acknowledge(self):
+        if self._in_flight:
+            self._in_flight_bytes -= self._in_flight.popleft()
+        self._last_ack = time.monotonic()
+
+    def _reclaim_unacknowledged(self):
+        if self._in_flight and time.monotonic() - self._last_ack >= self._ack_timeout:
+            log.warning(f"Datalink: no reply to {len(self._in_flight)} request(s) within {self._ack_timeout}s, "
+                        f"reclaiming their credit")
+            self._in_flight.clear()
+            self._in_flight_bytes = 0
+
+    def _select_timeout(self) -> Optional[float]:
+        if not self._in_flight:
+            return None  # nothing to time out, sleep until there is I/O
+        return max(0.0, self._last_ack + self._ack_timeout - time.monotonic())
 
-    def _read_lines(self) -> list[str]:
+    def _process_incoming(self):
+        if not self._read_into_framer():
+            return
+
+        for line in self._framer.lines():
+            if line[0] == BinaryDialect.FRAME_DELIMITER:
+                self._handle_frame(line[1:])
+                continue
+            handler = self._line_handlers.get(line[0])
+            if handler is not None:
+                content = str(line[1:], "utf-8", "replace").strip()
+                if content:
+                    handler(content)
+            elif content := str(line, "utf-8", "replace").strip():
+                self._handle_unknown_line(content)
+
+    def _read_into_framer(self) -> bool:
         try:
-            lines = self._io.readlines()
-            lines = [l.decode("utf-8").strip() for l in lines]  # decode to utf
-            lines = [l for l in lines if l]  # no empty strings
-            return lines;
+            data = os.read(self._io.fileno(), self.READ_CHUNK_SIZE)
+            if not data:
+                log.error("Datalink: serial port reached end of file, ceasing to read")
+                self._detach()
+                return False
+            self._framer.feed(data)
+            return True
+        except BlockingIOError:
+            return False  # spurious wakeup, nothing to read
+        except OSError as e:
+            log.error(f"Datalink: serial port failed: {e}")
+            self._detach()
+            return False
         except Exception as e:
             log.warning("Exception while reading incoming data: %s", e)
-            return []
+            return False
 
     def _handle_log_line(self, line):
-        log.info(line)
-        self._log_file.write(f"{datetime.now()}: {line}\n")
-        self._log_file.flush()
+        self._queue_log_line(logging.INFO, line)
 
     def _handle_api_line(self, line):
         if line.endswith(Dialect.Operator.RESPONSE_FOOTER.value):
             complete_line = self._combine_with_remainder(line[:-1].strip())
-            self._incoming_api.put(complete_line)
+            self._dispatch_api_line(complete_line)
         else:
             if self._incoming_api_remainder is None:
                 self._incoming_api_remainder = []
             self._incoming_api_remainder.append(line)
 
+    def _handle_frame(self, frame):
+        if self._binary is None:
+            log.warning(f"Datalink: dropping binary frame, no binary dialect was negotiated: {bytes(frame).hex()}")
+            return
+        try:
+            line = self._binary.parse_reply(bytes(frame))
+        except ValueError as e:
+            log.warning(f"Datalink: dropping corrupt binary frame: {e}")
+            self._acknowledge()  # it was a reply all the same, the request it answers will time out
+            return
+        self._dispatch_api_line(line)
+
     def _handle_debug_line(self, line):
-        log.debug(line)
-        if log.level == logging.DEBUG:
-            self._log_file.write(f"{datetime.now()}: {line}\n")
+        self._queue_log_line(logging.DEBUG, line)
+
+    def _queue_log_line(self, level: int, line: str):
+        """ Never blocks: when the listener falls behind the line is dropped and counted """
+        self._log_queue.handle(logging.LogRecord(log.name, level, "", 0, line, None, None))
 
     def _handle_unknown_line(self, line):
         if self._incoming_api_remainder is not None:
-            self._incoming_api_remainder.append(line)
             if line.endswith(Dialect.Operator.RESPONSE_FOOTER.value):
                 complete_line = self._combine_with_remainder(line[:-1].strip())
-                self._incoming_api.put(complete_line)
+                self._dispatch_api_line(complete_line)
+            else:
+                self._incoming_api_remainder.append(line)
         else:
             log.warning(f"Datalink: received line without header: {line}")
 
+    def _dispatch_api_line(self, line):
+        if line.startswith(self.USAGE_REPLY):
+            if self._usage_requests == 0:
+                return  # a late reply to the identification probe, it answers no request of ours
+            self._usage_requests -= 1
+        self._acknowledge()
+        if self._api_line_handler is not None:
+            self._api_line_handler(line)
+        else:
+            self._incoming_api.put(line)
+
     def _combine_with_remainder(self, line):
         if self._incoming_api_remainder:
             self._incoming_api_remainder.append(line)
@@ -169,14 +400,77 @@ class Datalink:
 
     def stop(self, blocking: bool = False):
         self._flag_shutdown.set()
+        self._wakeup()
         if blocking:
             self.wait()
 
     @property
     def _io(self) -> Optional[RawIOBase]:
-        if self._io_handle is None:
-            try:
-                self._io_handle = open_next_available_serial(baudrate=115200, timeout=self._io_timeout)
-            except SerialException:
-                log.error("Failed to open serial port")
         return self._io_handle
+
+    def _open_serial(self) -> Optional[RawIOBase]:
+        try:
+            if self._device is not None:
+                return open_serial_device(self._device, baudrate=115200, timeout=self._io_timeout,
+                                          probe=self.IDENTIFICATION_PROBE,
+                                          reply_prefix=self.IDENTIFICATION_REPLY_PREFIX)
+            return open_next_available_serial(baudrate=115200, timeout=self._io_timeout,
+                                              probe=self.IDENTIFICATION_PROBE,
+                                              reply_prefix=self.IDENTIFICATION_REPLY_PREFIX, binding=self._binding)
+        except SerialException as e:
+            log.error(f"Failed to open serial port: {e}")
+            return None
+
+    def _detach(self):
+        """ Stop using the current serial port and, if we discovered it, look for the device again """
+        if self._io_handle is None:
+            return
+        self._selector.unregister(self._io_handle.fileno())
+        try:
+            self._io_handle.close()
+        except (OSError, SerialException):
+            pass
+        self._io_handle = None
+        self._framer = LineFramer()
+        self._incoming_api_remainder = None
+        self._in_flight.clear()
+        self._in_flight_bytes = 0
+        self._usage_requests = 0
+        self._binary = None  # a controller that comes back has restarted in text mode
+        if self._connection_handler is not None:
+            self._connection_handler(False)
+        self._start_reconnector()
+
+    def _start_reconnector(self):
+        if not self._rediscover:
+            return  # the port was handed to us, there is nothing to rediscover
+        if self._reconnector is None or not self._reconnector.is_alive():
+            self._reconnector = Thread(target=self._reconnect)
+            self._reconnector.start()
+
+    def _reconnect(self):
+        """ Rediscover the device with exponential backoff, off the I/O thread which keeps serving its queues """
+        delay = self.RECONNECT_DELAY
+        while not self._flag_shutdown.is_set():
+            io = self._open_serial()
+            if io is not None:
+                os.set_blocking(io.fileno(), False)
+                self._reconnected_io = io
+                self._wakeup()
+                return
+            log.info(f"Datalink: no device found, retrying in {delay:.1f}s")
+            self._flag_shutdown.wait(timeout=delay)
+            delay = min(delay * 2, self.RECONNECT_DELAY_MAX)
+
+    def _attach_reconnected(self):
+        io, self._reconnected_io = self._reconnected_io, None
+        if io is None:
+            return
+        if self._flag_shutdown.is_set():
+            io.close()
+            return
+        self._io_handle = io
+        self._selector.register(io.fileno(), selectors.EVENT_READ)
+        log.info(f"Datalink: connected to {getattr(io, 'port', io)}")
+        if self._connection_handler is not None:
+            self._connection_handler(True)
@@ -0,0 +1,99 @@
+import re
+from pathlib import Path
+from threading import Lock
+from typing import Optional
+
+from _kaskas.datalink_process import DatalinkProcess
+from _kaskas.datalink_serial import Datalink as DatalinkSerial
+from _kaskas.kaskas_api import KasKasAPI
+from _kaskas.log import log
+from _kaskas.utils.io_serial import device_id_of, identify_serial_ports, serial_port_candidates
+
+
+class Device:
+    """ A controller attached to this host, with its own datalink, API and directory """
+
+    __slots__ = ("id", "root", "datalink", "api")
+
+    id: str
+    root: Path
+    datalink: DatalinkSerial | DatalinkProcess
+    api: KasKasAPI
+
+    def __init__(self, id: str, root: Path, datalink: DatalinkSerial | DatalinkProcess, api: KasKasAPI) -> None:
+        self.id = id
+        self.root = root
+        self.datalink = datalink
+        self.api = api
+
+    @property
+    def api_name(self) -> str:
+        return f"{KasKasAPI.cannonical_name()}.{self.id}"
+
+
+class DeviceRegistry:
+    """ Opens a Datalink and KasKasAPI for every controller attached to this host.
+
+    Every device lives in its own directory below `root/devices`, named after its USB serial number, where it keeps
+    its log, lock and timeseries. Each datalink runs its own I/O thread and, when its port fails, rediscovers its own
+    device only. The command schemas are shared, as they are keyed by firmware version. With `isolated`, every
+    datalink runs in a process of its own.
+    """
+
+    DEVICES_DIRNAME = "devices"
+    SCHEMA_DIRNAME = "schema"
+
+    _root: Path
+    _api_options: dict
+    _identify_timeout: float
+    _isolated: bool
+
+    _lock: Lock
+    _devices: dict[str, Device]
+
+    def __init__(self, root: Path, api_options: Optional[dict] = None, identify_timeout: float = 2.5,
+                 isolated: bool = False) -> None:
+        self._root = root
+        self._api_options = dict(api_options or {})
+        self._identify_timeout = identify_timeout
+        self._isolated = isolated
+        self._lock = Lock()
+        self._devices = {}
+
+    def discover(self) -> list[Device]:
+        """ Probe all ports that are not in use by a known device, returns the devices that were found """
+        with self._lock:
+            ports_in_use = {getattr(device.datalink._io, "port", None) for device in self._devices.values()
+                            if isinstance(device.datalink, DatalinkSerial)}
+            ports = [port for port in serial_port_candidates() if port not in ports_in_use]  # busy ports fail to open
+            found = []
+            for ser in identify_serial_ports(ports, 115200, self._identify_timeout,
+                                             DatalinkSerial.IDENTIFICATION_PROBE,
+                                             DatalinkSerial.IDENTIFICATION_REPLY_PREFIX):
+                device_id = device_id_of(ser.port)
+                name = re.sub(r"[^\w-]", "_", device_id).strip("_")
+                if name in self._devices:
+                    ser.close()  # reattached on another port; its datalink is rediscovering it already
+                    continue
+                root = self._root / self.DEVICES_DIRNAME / name
+                root.mkdir(parents=True, exist_ok=True)
+                if self._isolated:
+                    ser.close()  # the datalink process opens the device itself
+                    datalink = DatalinkProcess(root=root, device=device_id)
+                else:
+                    ser.timeout = 0.1
+                    datalink = DatalinkSerial(root=root, io=ser, device=device_id)
+                api = KasKasAPI(datalink=datalink, schema_dir=self._root / self.SCHEMA_DIRNAME, **self._api_options)
+                self._devices[name] = Device(name, root, datalink, api)
+                found.append(self._devices[name])
+                log.info(f"Devices: found {name} on {ser.port}")
+            return found
+
+    @property
+    def devices(self) -> list[Device]:
+        with self._lock:
+            return list(self._devices.values())
+
+    def stop(self, blocking: bool = False) -> None:
+        for device in self.devices:
+            device.datalink.stop(blocking=blocking)
@@ -1,4 +1,5 @@
 from enum import Enum, Flag, auto
+from typing import Optional
 
 
 class Dialect:
@@ -6,8 +7,34 @@ class Dialect:
     HEADER_LOG = "#"
     HEADER_DEBUG = "!"
 
+    # headers as the first byte of an undecoded line
+    HEADER_API_BYTE = ord(HEADER_API)
+    HEADER_LOG_BYTE = ord(HEADER_LOG)
+    HEADER_DEBUG_BYTE = ord(HEADER_DEBUG)
+
     class Operator(Enum):
         REQUEST = ":"
         RESPONSE = "<"
         REQUEST_PRINT_USAGE = "?"
         RESPONSE_FOOTER = ">"
+        REQUEST_ID = "~"  # optional trailing correlation id, eg. 'Fluids:isOutOfWater~12' -> 'Fluids<OK:True~12>'
+
+    @staticmethod
+    def format_request(module: str, command: Optional[str], args: Optional[list[str]] = None,
+                       request_id: Optional[int] = None) -> str:
+        if module == Dialect.Operator.REQUEST_PRINT_USAGE.value:
+            line = Dialect.Operator.REQUEST_PRINT_USAGE.value
+        else:
+            argument_substring = Dialect.Operator.REQUEST.value + "|".join(args) if args else ""
+            line = f"{module}{Dialect.Operator.REQUEST.value}{command}{argument_substring}"
+        if request_id is not None:
+            line += f"{Dialect.Operator.REQUEST_ID.value}{request_id}"
+        return line + "\n"
+
+    @staticmethod
+    def split_request_id(line: str) -> tuple[str, Optional[int]]:
+        """ Split the optional trailing correlation id off a reply, eg. 'Fluids<OK:True~12' -> ('Fluids<OK:True', 12) """
+        body, separator, request_id = line.rpartition(Dialect.Operator.REQUEST_ID.value)
+        if not separator or not request_id.isdigit():
+            return line, None
+        return body, int(request_id)
@@ -1,18 +1,14 @@
 import string
+import time
 
 from _kaskas.log import log
 from serial import SerialTimeoutException
 from serial import SerialException
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional, Sequence
 from pathlib import Path
 from enum import Enum, Flag, auto
-from multiprocessing.synchronize import Lock
-from multiprocessing import Lock as createLock
-
-from multiprocessing import Queue
-from queue import Empty as QueueEmpty
-from threading import Thread, Event
+from threading import Thread, Event, RLock
 from io import RawIOBase
 from typing import TextIO
 import Pyro5.api
@@ -20,7 +16,17 @@ import Pyro5.api
 from _kaskas.utils.io_serial import open_next_available_serial
 from _kaskas.utils.filelock import FileLock
 from _kaskas.datalink_serial import Datalink as DatalinkSerial
+from _kaskas.datalink_process import DatalinkProcess
 from _kaskas.dialect import Dialect
+from _kaskas.pending_requests import PendingRequest, PendingRequestTable
+from _kaskas.response_cache import ResponseCache
+from _kaskas.request_scheduler import OutgoingRequest, Priority
+from _kaskas.latency_tracker import LatencyTracker
+from _kaskas.subscriptions import SubscriptionManager
+from _kaskas.command_schema import DECODERS, CommandSchema, decode_value
+from _kaskas.binary_dialect import BinaryDialect
+from _kaskas.utils.deadline_timer import DeadlineTimer
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 
 class Response:
@@ -32,21 +38,36 @@ class Response:
         COMMUNICATION_ERROR = auto()
         TIMEOUT = auto()
         UNKNOWN_ERROR = auto()
+        BUSY = auto()  # too many requests are waiting for the controller already
+
+    __slots__ = ("status", "arguments", "values")
 
     status: Status
     arguments: Optional[list[str]]
+    values: Optional[list]  # the arguments decoded to bool, int, float or str
+
+    # numeric replies of at least this many values travel over Pyro as a single string instead of a list of strings
+    JOIN_MIN_VALUES = 8
 
     def __init__(
-            self, status: Status, arguments: Optional[list[str]] = None
+            self, status: Status, arguments: Optional[list[str]] = None, values: Optional[list] = None
     ) -> None:
         self.status = self.Status(status)
         self.arguments = arguments
+        self.values = values
+
+    def as_array(self) -> "numpy.ndarray":
+        """ The values as a float64 numpy array, eg. for timeseries """
+        import numpy
+
+        return numpy.asarray(self.values if self.values is not None else [], dtype=numpy.float64)
 
     def __bool__(self) -> bool:
         return bool(self.status & (self.Status.OK | self.Status.BAD_INPUT | self.Status.BAD_RESULT))
 
     def __repr__(self) -> str:
-        return f"{self.status.name}: {self.arguments if len(self.arguments) > 1 else self.arguments[0]} "
+        arguments = self.arguments if not self.arguments or len(self.arguments) > 1 else self.arguments[0]
+        return f"{self.status.name}: {arguments} "
 
     def __str__(self) -> str:
         status = f"[bold green]{self.status.name}[/bold green]" if self.status == self.Status.OK else f"[bold red]{self.status.name}[/bold red]"
@@ -58,33 +79,149 @@ class KasKasAPI:
     """_summary_"""
 
     _response_timeout: float
-    _dl: DatalinkSerial
-
-    def __init__(self, datalink: DatalinkSerial, response_timeout: float = 3.0) -> None:
+    _dl: DatalinkSerial | DatalinkProcess
+    _pending: PendingRequestTable
+    _submit_lock: RLock
+    _cache: ResponseCache
+    _inflight: dict[tuple, tuple[PendingRequest, float]]  # with the deadline after which it is dropped unsent
+    _latency: LatencyTracker
+    _subscriptions: SubscriptionManager
+    _timer: DeadlineTimer
+    _schema_dir: Optional[Path]
+    _schema: Optional[CommandSchema]
+    _schema_verified: bool  # whether _schema is that of the firmware connected now
+    _binary_framing: bool
+    _binary: Optional[BinaryDialect]
+    _max_pending: Optional[int]
+
+    # read-only queries and the time-to-live in seconds of their cached responses; a ttl of 0 disables caching
+    QUERY_TTLS: dict[tuple[str, str], float] = {
+        ("Fluids", "isOutOfWater"): 2.0,
+        ("Fluids", "injectionEffect"): 10.0,
+        ("Fluids", "timeSinceLastDosis"): 2.0,
+        ("DAQ", "getTimeSeriesColumns"): 300.0,
+        ("DAQ", "getTimeSeries"): 0.0,
+        ("?", "?"): 600.0,
+    }
+    # default response timeout in seconds for commands which take longer or shorter than response_timeout
+    COMMAND_TIMEOUTS: dict[tuple[str, str], float] = {
+        ("?", "?"): 10.0,
+    }
+    # commands that change the state of their module and invalidate its cached responses
+    MUTATING_COMMANDS: set[tuple[str, str]] = {
+        ("Fluids", "waterNow"),
+    }
+
+    def __init__(self, datalink: DatalinkSerial | DatalinkProcess, response_timeout: float = 3.0, request_ids: bool = False,
+                 cache_ttls: Optional[dict[tuple[str, str], float]] = None, cache_size: int = 256,
+                 timeout_floor: float = 0.25, timeout_ceiling: float = 10.0,
+                 schema_dir: Optional[Path] = None, binary_framing: bool = False,
+                 max_pending: Optional[int] = None) -> None:
 
         self._response_timeout = response_timeout
         self._dl = datalink
+        self._pending = PendingRequestTable(use_request_ids=request_ids)
+        self._cache = ResponseCache(ttls=self.QUERY_TTLS if cache_ttls is None else cache_ttls, max_entries=cache_size)
+        self._submit_lock = RLock()
+        self._inflight = {}
+        self._latency = LatencyTracker(floor=timeout_floor, ceiling=timeout_ceiling)
+        self._subscriptions = SubscriptionManager(request_many=self.request_many, is_running=lambda: self._dl.is_started)
+        self._timer = DeadlineTimer(is_running=lambda: self._dl.is_started)
+        self._schema_dir = schema_dir
+        self._schema = CommandSchema.load_latest(schema_dir) if schema_dir else None
+        self._schema_verified = False  # until the usage of the connected firmware is known
+        self._binary_framing = binary_framing
+        self._binary = None
+        self._max_pending = max_pending  # requests waiting for the controller beyond this are answered with BUSY
+        self._dl.set_api_line_handler(self._pending.resolve)
+        self._dl.set_connection_handler(self._connection_changed)
         self._dl.start()
+        if self._dl.is_connected:
+            Thread(target=self._prepare_link).start()  # otherwise once the controller is found
 
     @staticmethod
     def cannonical_name() -> str:
         return "kaskas.api"
 
     def request(
-            self, module: str, command: Optional[str], args: Optional[list[str]] = None
+            self, module: str, command: Optional[str], args: Optional[list[str]] = None,
+            priority: Optional[Priority] = None, timeout: Optional[float] = None
     ) -> Optional[Response]:
-        if not self._dl.is_connected:
-            return Response(Response.Status.COMMUNICATION_ERROR, ["Not connected"])
-
-        request_line = None
-        if module == "?":  # this is a request to print usage
-            request_line = f"{Dialect.Operator.REQUEST_PRINT_USAGE.value}\n"
-        else:
-            argument_substring = ":" + "|".join(args) if args else ""
-            request_line = f"{module}{str(Dialect.Operator.REQUEST.value)}{command}{argument_substring}\n"  # \r\n ?
-        # print(f"writing request line {request_line}")
-        self._dl.write_line(request_line)
-        return self._read_response_for(module)
+        return self.request_many([(module, command, args)], priority=priority, timeout=timeout)[0]
+
+    def request_many(self, requests: Sequence[Sequence], priority: Optional[Priority] = None,
+                     timeout: Optional[float] = None) -> list[Response]:
+        """ Send a batch of (module, command[, args]) requests back-to-back and return their responses in order
+
+        Without an explicit priority, mutating commands are scheduled as control and everything else as interactive.
+        Without an explicit timeout (in seconds), every request uses a timeout derived from the round-trip times
+        observed for its command, or its entry in COMMAND_TIMEOUTS or response_timeout while too few were observed.
+        A request that is still queued when its timeout expires is never sent and returns TIMEOUT right away.
+        """
+        responses = []
+        for result, entry, deadline in self._dispatch(requests, priority=priority, timeout=timeout):
+            try:
+                responses.append(result.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeoutError:
+                self._time_out(entry, result)
+                responses.append(result.result())
+        return responses
+
+    def _request_async(
+            self, module: str, command: Optional[str], args: Optional[list[str]] = None,
+            priority: Optional[Priority] = None, timeout: Optional[float] = None
+    ) -> Future:
+        """ Like request(), but returns right away with a Future of the Response; not exposed, a Future does not
+        travel over Pyro """
+        return self._request_many_async([(module, command, args)], priority=priority, timeout=timeout)[0]
+
+    def _request_many_async(self, requests: Sequence[Sequence], priority: Optional[Priority] = None,
+                            timeout: Optional[float] = None) -> list[Future]:
+        """ Like request_many(), but returns right away with a Future of every Response; not exposed either
+
+        Every Future completes by the deadline of its request at the latest, with a TIMEOUT response if no reply
+        arrived. Callbacks added to the Futures run on the datalink thread and should not block.
+        """
+        return [result for result, _, _ in self._dispatch(requests, priority=priority, timeout=timeout)]
+
+    def subscribe(self, module: str, command: str, args: Optional[list[str]] = None, interval: float = 10.0,
+                  callback: Optional[object] = None) -> str:
+        """ Receive the response to a request every interval seconds, returns the subscription id
+
+        The request is sent once per interval no matter how many subscribers there are. Responses are delivered to
+        `callback.on_value(subscription_id, response)`, eg. a Pyro-exposed object of a remote client, or are queued
+        for poll_subscription() when no callback is given. Such a subscription is dropped when it is not polled for
+        several intervals, and at least a minute.
+        """
+        return self._subscriptions.subscribe(module, command, args, interval=interval, callback=callback)
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        return self._subscriptions.unsubscribe(subscription_id)
+
+    def poll_subscription(self, subscription_id: str, timeout: float = 0.0, limit: Optional[int] = None
+                          ) -> list[Response]:
+        """ Take the queued responses of a subscription without callback, waiting up to timeout for the first one """
+        return self._subscriptions.poll(subscription_id, timeout=timeout, limit=limit)
+
+    def cache_statistics(self) -> dict[str, int]:
+        """ Hit, miss, eviction and invalidation counters of the response cache """
+        return self._cache.statistics()
+
+    def command_schema(self) -> dict[str, dict[str, dict]]:
+        """ Arguments and return types per module and command, as parsed from the usage output of the firmware """
+        return self._schema.as_dict() if self._schema is not None else {}
+
+    def latency_statistics(self) -> dict[str, dict[str, float]]:
+        """ Observed round-trip times and derived timeout per 'module:command' """
+        return self._latency.statistics()
+
+    def recent_logs(self, since: Optional[int] = None, limit: int = 100) -> list[dict]:
+        """ The last log and debug lines of the firmware as dicts of seq, time, level and text.
+
+        Without since the last limit lines are returned, otherwise the lines from sequence number since onwards; pass
+        the last seq seen plus one to follow the log.
+        """
+        return self._dl.recent_logs(since=since, limit=limit)
 
     def map(self, attrs: dict[str, list[str]]) -> dict[str, Optional[str]]:
         """ Dictionary containing  """
@@ -92,7 +229,8 @@ class KasKasAPI:
 
             # query all values for the given Dict[module, command]
             # eg. attr = { "Fluids", ["timeSinceLastDosis", "isOutOfWater"] }
-            d = {f"{k}:{v}": self.request(k, v).arguments for k, v_list in attrs.items() for v in v_list}
+            queries = [(k, v) for k, v_list in attrs.items() for v in v_list]
+            d = {f"{k}:{v}": response.arguments for (k, v), response in zip(queries, self.request_many(queries))}
 
             validated = all([bool(k) for k, v in d.items()])
             if not validated:
@@ -102,13 +240,232 @@ class KasKasAPI:
             log.warning(f"Failed retrieving datamap from api: {e}")
             return {}
 
-    def _read_response_for(self, module: str) -> Response:
-        raw_line = self._dl.next_api_line(timeout=self._response_timeout)
-        # assert raw_line and len(raw_line) > 0, f"datalink gave illegal response: {raw_line}"
+    def _dispatch(self, requests: Sequence[Sequence], priority: Optional[Priority] = None,
+                  timeout: Optional[float] = None) -> list[tuple[Future, Optional[PendingRequest], float]]:
+        """ Submit a batch of requests, returns per request the Future of its Response, its pending entry (None
+        when answered from cache) and its deadline """
+        now = time.monotonic()
+        if not self._dl.is_connected:
+            return [(self._completed(Response(Response.Status.COMMUNICATION_ERROR, ["Not connected"])), None, now)
+                    for _ in requests]
+
+        requests = [self._normalized(module, command, rest[0] if rest else None) for module, command, *rest in requests]
+        dispatched: list[Optional[tuple]] = [None] * len(requests)
+        uncached = []
+        for index, request in enumerate(requests):
+            response = self._rejected(*request) or self._cached_response(*request)
+            if response is None:
+                uncached.append(index)
+            else:
+                dispatched[index] = (self._completed(response), None, now)
+        if not uncached:
+            return dispatched
+        if self._max_pending is not None and self._pending.outstanding + len(uncached) > self._max_pending:
+            for index in uncached:
+                dispatched[index] = (self._completed(Response(Response.Status.BUSY, ["Too many pending requests"])),
+                                     None, now)
+            return dispatched
+
+        for module, command, _ in requests:
+            if (module, command) in self.MUTATING_COMMANDS:
+                self._cache.invalidate_module(module)
+
+        deadlines = [now + (self._timeout_for(*requests[index][:2]) if timeout is None else timeout)
+                     for index in uncached]
+        pending = self._submit([requests[index] for index in uncached], deadlines, priority=priority)
+        for index, entry, deadline in zip(uncached, pending, deadlines):
+            result = Future()
+            result.set_running_or_notify_cancel()  # a request cannot be recalled once submitted
+            entry.future.add_done_callback(
+                lambda future, entry=entry, request=requests[index], result=result:
+                self._complete(entry, request, result, future))
+            self._timer.schedule(deadline, lambda entry=entry, result=result: self._time_out(entry, result))
+            dispatched[index] = (result, entry, deadline)
+        return dispatched
 
-        if not raw_line:
-            return Response(Response.Status.TIMEOUT)
+    @staticmethod
+    def _completed(response: Response) -> Future:
+        result = Future()
+        result.set_result(response)
+        return result
 
+    @staticmethod
+    def _normalized(module: str, command: Optional[str], args: Optional[list[str]]) -> tuple:
+        if module == Dialect.Operator.REQUEST_PRINT_USAGE.value:
+            return module, module, None  # the usage request takes neither command nor arguments
+        return module, command, args
+
+    def _rejected(self, module: str, command: Optional[str], args: Optional[list[str]]) -> Optional[Response]:
+        """ A BAD_INPUT response for requests the firmware would reject according to its schema """
+        if not self._schema_verified or module == Dialect.Operator.REQUEST_PRINT_USAGE.value \
+                or (module, command) == BinaryDialect.HANDSHAKE:
+            return None
+        error = self._schema.validate(module, command, args)
+        return Response(Response.Status.BAD_INPUT, [error]) if error else None
+
+    def _decode(self, module: str, command: Optional[str], response: Response) -> Response:
+        if response.status == Response.Status.OK and module != Dialect.Operator.REQUEST_PRINT_USAGE.value:
+            if self._schema_verified:
+                response.values = self._schema.decode(module, command, response.arguments)
+            elif response.arguments is not None:
+                response.values = [decode_value(value) for value in response.arguments]
+        return response
+
+    def _connection_changed(self, connected: bool) -> None:
+        """ Called by the datalink when the controller is lost or found again; a controller that comes back has
+        restarted, so whatever was negotiated with it before is void and its unanswered requests are lost """
+        self._cache.clear()  # the replies of other firmware, or of state that changed while it was away
+        if connected:
+            Thread(target=self._prepare_link).start()
+            return
+        self._binary = None
+        self._dl.set_binary_dialect(None)
+        self._schema_verified = False  # the controller may come back with other firmware
+        self._pending.fail_sent()
+
+    def _prepare_link(self) -> None:
+        self._refresh_schema()
+        if self._binary_framing:
+            self._negotiate_binary_framing()
+
+    def _negotiate_binary_framing(self) -> None:
+        """ Switch API traffic to binary frames when the firmware supports them, text remains for everything else """
+        reply = self.request(*BinaryDialect.HANDSHAKE, [str(BinaryDialect.VERSION)], priority=Priority.CONTROL)
+        if reply.status != Response.Status.OK:
+            log.info(f"Binary framing: not supported by firmware, staying in text mode ({reply!r})")
+            return
+        try:
+            dialect = BinaryDialect.from_handshake(reply.arguments)
+        except ValueError as e:
+            log.warning(f"Binary framing: unusable handshake, staying in text mode: {e}")
+            return
+        self._dl.set_binary_dialect(dialect)
+        self._binary = dialect
+        log.info(f"Binary framing: enabled for {len(reply.arguments) - 1} command(s)")
+
+    def _refresh_schema(self) -> None:
+        """ Parse the usage output of the connected firmware once and persist it, keyed by firmware version """
+        self._cache.invalidate_module(Dialect.Operator.REQUEST_PRINT_USAGE.value)  # ask the firmware, not the cache
+        usage = self.request(Dialect.Operator.REQUEST_PRINT_USAGE.value, None, priority=Priority.BACKGROUND)
+        if usage.status != Response.Status.OK or not usage.arguments:
+            log.warning(f"Schema: failed to retrieve usage from firmware: {usage!r}")
+            return
+        schema = CommandSchema.parse(usage.arguments[0])
+        if self._schema is None or self._schema.key != schema.key:
+            log.info(f"Schema: firmware {schema.key} provides {sum(len(c) for c in schema.as_dict().values())} command(s)")
+        self._schema = schema
+        self._schema_verified = True
+        if self._schema_dir is not None:
+            try:
+                schema.save(self._schema_dir)
+            except OSError as e:
+                log.warning(f"Schema: failed to persist schema: {e}")
+
+    def _cached_response(self, module: str, command: Optional[str], args: Optional[list[str]]) -> Optional[Response]:
+        if not self._cache.is_cacheable(module, command):
+            return None
+        return self._cache.get(ResponseCache.key(module, command, args))
+
+    def _update_cache(self, module: str, command: Optional[str], args: Optional[list[str]], response: Response) -> None:
+        if (module, command) in self.MUTATING_COMMANDS:
+            self._cache.invalidate_module(module)  # drop replies to reads that raced with this command
+        elif response.status == Response.Status.OK:
+            self._cache.put(ResponseCache.key(module, command, args), response)
+
+    def _is_read_only(self, module: str, command: Optional[str]) -> bool:
+        return module == Dialect.Operator.REQUEST_PRINT_USAGE.value or (module, command) in self.QUERY_TTLS
+
+    def _priority_of(self, module: str, command: Optional[str]) -> Priority:
+        return Priority.CONTROL if (module, command) in self.MUTATING_COMMANDS else Priority.INTERACTIVE
+
+    def _timeout_for(self, module: str, command: Optional[str]) -> float:
+        adaptive = self._latency.timeout_for((module, command))
+        if adaptive is not None:
+            return adaptive
+        return self.COMMAND_TIMEOUTS.get((module, command), self._response_timeout)
+
+    def _record_latency(self, entry: PendingRequest, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self._latency.record((entry.module, entry.command), time.monotonic() - entry.submitted)
+
+    def _submit(self, requests: list[tuple[str, Optional[str], Optional[list[str]]]], deadlines: list[float],
+                priority: Optional[Priority] = None) -> list[PendingRequest]:
+        now = time.monotonic()
+        with self._submit_lock:
+            pending = []
+            outgoing = []
+            for (module, command, args), deadline in zip(requests, deadlines):
+                single_flight = self._is_read_only(module, command)
+                key = ResponseCache.key(module, command, args)
+                entry, queued_until = self._inflight.get(key, (None, 0.0)) if single_flight else (None, 0.0)
+                if entry is not None and not entry.sent and queued_until < deadline:
+                    entry = None  # it may be dropped unsent before this caller gives up, send a request of its own
+                if entry is None:
+                    entry = self._pending.register(module, command)
+                    if deadline <= now:
+                        self._pending.expire(entry)  # the caller has given up already, don't bother the link
+                    else:
+                        outgoing.append(self._outgoing_request(module, command, args, entry, deadline, priority))
+                        entry.future.add_done_callback(lambda future, entry=entry: self._record_latency(entry, future))
+                        if single_flight:  # later identical reads wait on this request instead of sending their own
+                            self._inflight[key] = (entry, deadline)
+                            entry.future.add_done_callback(
+                                lambda _, key=key, entry=entry: self._forget_inflight(key, entry))
+                entry.waiters += 1
+                pending.append(entry)
+            if outgoing:
+                self._dl.submit(outgoing)
+        return pending
+
+    def _outgoing_request(self, module: str, command: Optional[str], args: Optional[list[str]],
+                          entry: PendingRequest, deadline: float, priority: Optional[Priority]) -> OutgoingRequest:
+        if self._binary is not None and self._binary.supports(module, command):
+            spec = self._schema.spec_for(module, command) if self._schema_verified else None
+            types = [argument.type for argument in spec.arguments] if spec is not None and spec.arguments else None
+            line = self._binary.format_request(module, command, args, request_id=entry.request_id, types=types)
+        else:
+            line = Dialect.format_request(module, command, args, request_id=entry.request_id).encode("utf-8")
+        return OutgoingRequest(
+            line,
+            priority=self._priority_of(module, command) if priority is None else Priority(priority),
+            deadline=deadline,
+            on_sent=lambda: self._pending.mark_sent(entry),
+            on_expired=lambda: self._pending.expire(entry),
+        )
+
+    def _forget_inflight(self, key: tuple, entry: PendingRequest) -> None:
+        with self._submit_lock:
+            if self._inflight.get(key, (None,))[0] is entry:
+                del self._inflight[key]
+
+    def _complete(self, pending: PendingRequest, request: tuple, result: Future, future: Future) -> None:
+        if isinstance(future.exception(), ConnectionError):  # the link was lost while it was waiting for its reply
+            self._time_out(pending, result, Response(Response.Status.COMMUNICATION_ERROR, ["Connection lost"]))
+            return
+        if future.exception() is not None:  # expired before it was sent
+            self._time_out(pending, result)
+            return
+        response = self._decode(pending.module, pending.command, self._parse_response(pending.module, future.result()))
+        self._update_cache(*request, response)
+        with self._submit_lock:
+            if not result.done():
+                result.set_result(response)
+
+    def _time_out(self, pending: PendingRequest, result: Future, response: Optional[Response] = None) -> None:
+        with self._submit_lock:
+            if result.done():
+                return
+            result.set_result(Response(Response.Status.TIMEOUT) if response is None else response)
+            pending.waiters -= 1
+            if pending.waiters == 0:  # only give up on the request when nobody is waiting for it anymore
+                for key in [key for key, (entry, _) in self._inflight.items() if entry is pending]:
+                    del self._inflight[key]
+                self._pending.abandon(pending)
+                if pending.sent and response is None:
+                    self._latency.record_timeout((pending.module, pending.command))
+
+    @staticmethod
+    def _parse_response(module: str, raw_line: str) -> Response:
         correct_reply_header = f"{module}{Dialect.Operator.RESPONSE.value}"
         if not raw_line.startswith(correct_reply_header):
             log.error(
@@ -121,7 +478,8 @@ class KasKasAPI:
         try:
             return_status = Response.Status[remainder_splitted[0]]
         except KeyError:
-            raise ValueError(f"Unknown status: {return_status}")
+            log.error(f"API: Request for {module} failed, unknown status in reply: {raw_line}")
+            return Response(Response.Status.BAD_RESPONSE)
 
         remainder = remainder[len(remainder_splitted[0]) + 1:]  # skip return code and seperator
 
@@ -144,8 +502,42 @@ class KasKasAPI:
     #         # self._log_file.flush()
 
 
-def response_dict_to_response(response, d):
-    return Response(d["status"], d["arguments"])
-
-
+# the compact wire format of a Response: its status as int and its arguments ('a'), with the values decoded again from
+# the arguments by one type code per value ('t') instead of being sent twice. The arguments of long numeric replies
+# travel as one '|' separated string ('j'), values that fit no type code as they are ('v').
+RESPONSE_TYPE_CODES: dict[type, str] = {bool: "b", int: "i", float: "f", str: "s"}
+RESPONSE_DECODERS: dict[str, Any] = {code: DECODERS[value_type.__name__]
+                                     for value_type, code in RESPONSE_TYPE_CODES.items()}
+
+
+def response_to_dict(response: Response) -> dict:
+    d = {"__class__": "_kaskas.kaskas_api.Response", "s": response.status.value}
+    arguments, values = response.arguments, response.values
+    codes = None
+    if values is not None and arguments is not None and len(values) == len(arguments):
+        codes = "".join(RESPONSE_TYPE_CODES.get(type(value), "?") for value in values)
+    if codes is None or "?" in codes:
+        d["a"] = arguments
+        if values is not None:
+            d["v"] = values
+    elif len(arguments) >= Response.JOIN_MIN_VALUES and not codes.strip("if"):
+        d["t"] = codes
+        d["j"] = "|".join(arguments)  # numbers never contain the separator
+    else:
+        d["t"] = codes
+        d["a"] = arguments
+    return d
+
+
+def response_dict_to_response(classname: str, d: dict) -> Response:
+    arguments = d["j"].split("|") if "j" in d else d.get("a")
+    codes = d.get("t")
+    if codes is not None:
+        values = [RESPONSE_DECODERS[code](argument) for code, argument in zip(codes, arguments)]
+    else:
+        values = d.get("v")
+    return Response(d["s"], arguments, values)
+
+
+Pyro5.api.register_class_to_dict(Response, response_to_dict)
 Pyro5.api.register_dict_to_class("_kaskas.kaskas_api.Response", response_dict_to_response)
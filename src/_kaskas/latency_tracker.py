@@ -0,0 +1,101 @@
+from collections import deque
+from threading import Lock
+from typing import Hashable, Optional
+
+
+class LatencyStatistics:
+    """ Round-trip time statistics of a single command """
+
+    __slots__ = ("count", "ewma", "deviation", "samples", "backoff")
+
+    count: int
+    ewma: float
+    deviation: float
+    samples: deque[float]
+    backoff: float
+
+    def __init__(self, window: int) -> None:
+        self.count = 0
+        self.ewma = 0.0
+        self.deviation = 0.0
+        self.samples = deque(maxlen=window)
+        self.backoff = 1.0
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LatencyTracker:
+    """ Derives response timeouts from the observed round-trip times of each command.
+
+    Like a TCP retransmission timer, the timeout is the larger of the smoothed round-trip time plus four times its
+    smoothed deviation and a margin over the 99th percentile of recent samples, clamped between floor and ceiling.
+    Every timeout doubles the estimate until the next reply arrives, so a command that became slower can recover.
+    """
+
+    _floor: float
+    _ceiling: float
+    _alpha: float
+    _beta: float
+    _margin: float
+    _min_samples: int
+    _window: int
+
+    _lock: Lock
+    _statistics: dict[Hashable, LatencyStatistics]
+
+    def __init__(self, floor: float = 0.25, ceiling: float = 10.0, alpha: float = 0.125, beta: float = 0.25,
+                 margin: float = 1.5, min_samples: int = 8, window: int = 128) -> None:
+        self._floor = floor
+        self._ceiling = ceiling
+        self._alpha = alpha
+        self._beta = beta
+        self._margin = margin
+        self._min_samples = min_samples
+        self._window = window
+        self._lock = Lock()
+        self._statistics = {}
+
+    def record(self, key: Hashable, rtt: float) -> None:
+        with self._lock:
+            statistics = self._statistics.setdefault(key, LatencyStatistics(self._window))
+            if statistics.count == 0:
+                statistics.ewma = rtt
+                statistics.deviation = rtt / 2
+            else:
+                statistics.deviation += self._beta * (abs(rtt - statistics.ewma) - statistics.deviation)
+                statistics.ewma += self._alpha * (rtt - statistics.ewma)
+            statistics.count += 1
+            statistics.samples.append(rtt)
+            statistics.backoff = 1.0
+
+    def record_timeout(self, key: Hashable) -> None:
+        with self._lock:
+            statistics = self._statistics.get(key)
+            if statistics is not None:
+                statistics.backoff = min(statistics.backoff * 2, 64.0)
+
+    def timeout_for(self, key: Hashable) -> Optional[float]:
+        """ The adaptive timeout for key, or None while too few round trips were observed """
+        with self._lock:
+            statistics = self._statistics.get(key)
+            if statistics is None or statistics.count < self._min_samples:
+                return None
+            return self._timeout(statistics)
+
+    def statistics(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                ":".join(str(part) for part in key) if isinstance(key, tuple) else str(key): {
+                    "count": statistics.count,
+                    "ewma": statistics.ewma,
+                    "p99": statistics.percentile(0.99),
+                    "timeout": self._timeout(statistics),
+                }
+                for key, statistics in self._statistics.items()
+            }
+
+    def _timeout(self, statistics: LatencyStatistics) -> float:
+        estimate = max(statistics.ewma + 4 * statistics.deviation, self._margin * statistics.percentile(0.99))
+        return min(self._ceiling, max(self._floor, estimate) * statistics.backoff)
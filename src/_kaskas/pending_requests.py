@@ -0,0 +1,182 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from itertools import count
+from threading import Lock
+from typing import Iterator, Optional
+
+from _kaskas.dialect import Dialect
+from _kaskas.log import log
+
+
+class PendingRequest:
+    """ A request that was written to the datalink and still awaits its reply """
+
+    __slots__ = ("sequence", "module", "command", "request_id", "submitted", "sent", "future", "abandoned",
+                 "abandoned_at", "displaced", "waiters")
+
+    sequence: int
+    module: str
+    command: Optional[str]
+    request_id: Optional[int]
+    submitted: float
+    sent: bool
+    future: Future
+    abandoned: bool
+    abandoned_at: float
+    displaced: bool  # an abandoned request older than this one consumed a reply while this one was waiting
+    waiters: int
+
+    def __init__(self, sequence: int, module: str, command: Optional[str], request_id: Optional[int]) -> None:
+        self.sequence = sequence
+        self.module = module
+        self.command = command
+        self.request_id = request_id
+        self.submitted = time.monotonic()
+        self.sent = False
+        self.future = Future()
+        self.abandoned = False
+        self.abandoned_at = 0.0
+        self.displaced = False
+        self.waiters = 0
+
+
+class PendingRequestTable:
+    """ Matches incoming API replies to the requests that are outstanding on the link.
+
+    When request ids are in use, replies are matched by id and replies carrying an unknown id are dropped as stale.
+    Replies without an id are matched to the request for the same module that was written to the link first. A request
+    whose caller gave up stays in the table as abandoned for abandon_grace seconds, so that its late reply is consumed
+    instead of answering the next request. When such a reply may have been the one of a younger request instead, the
+    younger request does not stay behind in turn once abandoned; else a single lost reply would have every following
+    request for the module time out.
+    """
+
+    _use_request_ids: bool
+    _stale_after: float
+    _abandon_grace: float
+
+    _lock: Lock
+    _sequence: Iterator[int]
+    _entries: OrderedDict[int, PendingRequest]
+    _sent: OrderedDict[int, PendingRequest]
+    _by_id: dict[int, PendingRequest]
+
+    REQUEST_ID_LIMIT = 0xFFFF  # ids fit an u16, where 0xFFFF means 'no id' in binary frames
+
+    def __init__(self, use_request_ids: bool = False, stale_after: float = 30.0, abandon_grace: float = 3.0) -> None:
+        self._use_request_ids = use_request_ids
+        self._stale_after = stale_after
+        self._abandon_grace = abandon_grace
+        self._lock = Lock()
+        self._sequence = count()
+        self._entries = OrderedDict()
+        self._sent = OrderedDict()  # in the order in which the requests went out on the wire
+        self._by_id = {}
+
+    def register(self, module: str, command: Optional[str] = None) -> PendingRequest:
+        with self._lock:
+            self._prune_stale()
+            sequence = next(self._sequence)
+            request_id = sequence % self.REQUEST_ID_LIMIT if self._use_request_ids else None
+            entry = PendingRequest(sequence, module, command, request_id)
+            self._entries[sequence] = entry
+            if request_id is not None:
+                self._by_id[request_id] = entry
+            return entry
+
+    def mark_sent(self, entry: PendingRequest) -> None:
+        with self._lock:
+            entry.sent = True
+            if entry.sequence in self._entries:
+                self._sent[entry.sequence] = entry
+
+    def abandon(self, entry: PendingRequest) -> None:
+        with self._lock:
+            entry.abandoned = True
+            entry.abandoned_at = time.monotonic()
+            if entry.request_id is not None:
+                self._remove(entry)  # a late reply will carry an unknown id and is dropped as stale
+            elif entry.displaced:
+                self._remove(entry)  # an older abandoned request may have consumed its reply already
+
+    def expire(self, entry: PendingRequest) -> None:
+        """ Fail a request that was dropped before it was written to the link """
+        with self._lock:
+            self._remove(entry)
+        if not entry.future.done():
+            entry.future.set_exception(FutureTimeoutError(f"Request for {entry.module} expired before it was sent"))
+
+    def fail_sent(self) -> None:
+        """ Fail every request that was written to the link, after the link was lost along with their replies """
+        with self._lock:
+            lost = list(self._sent.values())
+            for entry in lost:
+                self._remove(entry)
+        for entry in lost:
+            if not entry.future.done():
+                entry.future.set_exception(ConnectionError(f"Link lost before {entry.module} replied"))
+
+    def resolve(self, raw_line: str) -> None:
+        """ Hand an incoming API line to the request it answers """
+        line, request_id = Dialect.split_request_id(raw_line) if self._use_request_ids else (raw_line, None)
+        module = line.split(Dialect.Operator.RESPONSE.value, 1)[0]
+
+        with self._lock:
+            if request_id is not None:
+                entry = self._by_id.get(request_id)
+            else:
+                entry = self._find_oldest_for(module)
+
+            if entry is None:
+                log.warning(f"API: dropping stale or unsolicited reply: {raw_line}")
+                return
+            if request_id is None:
+                self._settle_module(entry)
+            self._remove(entry)
+
+        if entry.abandoned:
+            log.debug(f"API: dropping late reply for abandoned request: {raw_line}")
+        else:
+            entry.future.set_result(line)
+
+    @property
+    def outstanding(self) -> int:
+        with self._lock:
+            return sum(1 for entry in self._entries.values() if not entry.abandoned)
+
+    def _find_oldest_for(self, module: str) -> Optional[PendingRequest]:
+        horizon = time.monotonic() - self._abandon_grace
+        for entry in list(self._sent.values()):
+            if entry.module != module:
+                continue
+            if entry.abandoned and entry.abandoned_at < horizon:
+                self._remove(entry)  # its reply was lost, not late
+                continue
+            return entry
+        return None
+
+    def _settle_module(self, matched: PendingRequest) -> None:
+        """ A reply without id matched `matched`: update the requests for its module sent before and after it """
+        older = True
+        for entry in list(self._sent.values()):
+            if entry is matched:
+                older = False
+            elif entry.module != matched.module:
+                continue
+            elif older and entry.abandoned and not matched.abandoned:
+                self._remove(entry)  # replies come in order, so none will come for it anymore
+            elif not older and not entry.abandoned and matched.abandoned:
+                entry.displaced = True  # the reply may have been this one's
+
+    def _remove(self, entry: PendingRequest) -> None:
+        self._entries.pop(entry.sequence, None)
+        self._sent.pop(entry.sequence, None)
+        if entry.request_id is not None and self._by_id.get(entry.request_id) is entry:
+            del self._by_id[entry.request_id]
+
+    def _prune_stale(self) -> None:
+        horizon = time.monotonic() - self._stale_after
+        stale = [entry for entry in self._entries.values() if entry.abandoned and entry.submitted < horizon]
+        for entry in stale:
+            self._remove(entry)
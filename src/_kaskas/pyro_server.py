@@ -11,7 +11,7 @@ import Pyro5.socketutil
 import Pyro5.api
 import Pyro5.nameserver
 
-Pyro5.config.SERVERTYPE = "multiplex"
+Pyro5.config.SERVERTYPE = "multiplex"  # the nameserver, and the objects unless PyroServer is told otherwise
 Pyro5.config.POLLTIMEOUT = 3
 
 
@@ -23,34 +23,72 @@ Pyro5.config.POLLTIMEOUT = 3
 
 
 class PyroServer:
+    """ Serves objects over Pyro, next to an embedded nameserver.
+
+    The 'multiplex' server type handles all calls on a single thread, so one slow call holds up every other client.
+    The 'thread' server type gives every client connection a worker thread of its own, at most `workers` of them;
+    connections beyond that are refused. The nameserver then runs on a thread of its own.
+
+    With a unix_socket, every object is also served on that Unix domain socket under its name as object id, so that
+    clients on this host can reach it at `unix_address(unix_socket, name)` without a nameserver lookup or TCP.
+    """
+
+    SERVER_TYPES = ("multiplex", "thread")
+    SOCKET_FILENAME = "kaskas.sock"
+
     _flag_shutdown: Event
     _flag_up_and_running: Event
 
     _thread: Thread
+    _server_type: str
     _pyrodaemon: Pyro5.api.Daemon
+    _unixdaemon: Optional[Pyro5.api.Daemon]
     _nameserver: Pyro5.nameserver.NameServerDaemon
 
     Proxy = Pyro5.api.Proxy
 
-    def __init__(self):
+    def __init__(self, server_type: str = "multiplex", workers: int = 16, unix_socket: Optional[Path] = None):
+        assert server_type in self.SERVER_TYPES, f"Unknown Pyro server type: {server_type}"
         self._flag_shutdown = Event()
         self._flag_up_and_running = Event()
 
         self._thread = Thread(target=self._runner)
+        self._server_type = server_type
+
+        if server_type == "thread":
+            Pyro5.config.THREADPOOL_SIZE = workers  # the worker pool reads these whenever it scales
+            Pyro5.config.THREADPOOL_SIZE_MIN = min(Pyro5.config.THREADPOOL_SIZE_MIN, workers)
 
         hostname = socket.gethostname()
         # print(f"starting Pyro server on {hostname}")
-        self._pyrodaemon = Pyro5.api.Daemon(host=hostname)
+        self._pyrodaemon = self._create_daemon(host=hostname)
+        self._unixdaemon = None
+        if unix_socket is not None:
+            self._remove_stale_socket(unix_socket)
+            self._unixdaemon = self._create_daemon(unixsocket=str(unix_socket))
+
+    @staticmethod
+    def unix_address(unix_socket: Path, name: str) -> str:
+        """ The URI of the object served as name on unix_socket """
+        return f"PYRO:{name}@./u:{unix_socket}"
+
+    @property
+    def server_type(self) -> str:
+        return self._server_type
 
-    def serve_object(self, obj: object, name: str) -> str:
+    def serve_object(self, obj: object, name: str, aliases: Sequence[str] = ()) -> str:
         if not self.is_started:
             self.start()
 
+        if self._unixdaemon is not None:  # first, so that the Pyro attributes of obj refer to the TCP daemon
+            for registered_name in (name, *aliases):
+                self._unixdaemon.register(obj, objectId=registered_name, force=True)
         server_uri = self._pyrodaemon.register(obj)
         log.debug(f"Serving object {name}, uri: {server_uri}")
 
         # register it with the embedded nameserver
-        self._nameserver.nameserver.register(name, server_uri)
+        for registered_name in (name, *aliases):
+            self._nameserver.nameserver.register(registered_name, server_uri)
         return server_uri
 
     def wait(self):
@@ -77,6 +115,13 @@ class PyroServer:
         if wait:
             self._flag_up_and_running.wait()
 
+    def close(self) -> None:
+        """ Release the sockets of a server which was never started """
+        if not self.is_started:
+            self._pyrodaemon.close()
+            if self._unixdaemon is not None:
+                self._unixdaemon.close()
+
     def stop(self, blocking: bool = False) -> None:
         self._flag_shutdown.set()
         if blocking:
@@ -92,16 +137,29 @@ class PyroServer:
 
         self._nameserver = nameserver_daemon
 
-        self._pyrodaemon.combine(nameserver_daemon)
-        self._pyrodaemon.combine(broadcast_server)
-
         def _loop():
             return not self._flag_shutdown.is_set()
 
+        loop_threads = []
+        if self._server_type == "multiplex":
+            self._pyrodaemon.combine(nameserver_daemon)
+            self._pyrodaemon.combine(broadcast_server)
+            if self._unixdaemon is not None:
+                self._pyrodaemon.combine(self._unixdaemon)
+        else:  # a thread pool daemon cannot combine loops, the (multiplexing) nameserver gets a thread of its own
+            nameserver_daemon.combine(broadcast_server)
+            loop_threads.append(Thread(target=nameserver_daemon.requestLoop, args=(_loop,)))
+            if self._unixdaemon is not None:
+                loop_threads.append(Thread(target=self._unixdaemon.requestLoop, args=(_loop,)))
+        for thread in loop_threads:
+            thread.start()
+
         self._flag_up_and_running.set()
-        log.debug("Pyro is up and running")
+        log.debug(f"Pyro is up and running ({self._server_type})")
         self._pyrodaemon.requestLoop(_loop)
         self._flag_up_and_running.clear()
+        for thread in loop_threads:
+            thread.join()
 
         # cleanup
         log.debug("PyroServer: stopping nameserver..")
@@ -110,4 +168,32 @@ class PyroServer:
         broadcast_server.close()
         log.debug("PyroServer: stopping daemon..")
         self._pyrodaemon.close()
+        if self._unixdaemon is not None:
+            self._unixdaemon.close()  # removes the socket file
         log.debug("PyroServer shut down")
+
+    def _create_daemon(self, **kwargs) -> Pyro5.api.Daemon:
+        Pyro5.config.SERVERTYPE = self._server_type  # a Pyro daemon takes its server type from the global config
+        try:
+            return Pyro5.api.Daemon(**kwargs)
+        finally:
+            Pyro5.config.SERVERTYPE = "multiplex"
+
+    @staticmethod
+    def is_serving(unix_socket: Path) -> bool:
+        """ Whether a server accepts connections on unix_socket, rather than having left the file behind """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(str(unix_socket))
+            except OSError:
+                return False
+        return True
+
+    @staticmethod
+    def _remove_stale_socket(unix_socket: Path) -> None:
+        """ Remove the socket file a server left behind when it did not shut down, but never one that is in use """
+        if not unix_socket.exists():
+            return
+        if PyroServer.is_serving(unix_socket):
+            raise RuntimeError(f"Another KasKas daemon is serving on {unix_socket}")
+        unix_socket.unlink(missing_ok=True)
@@ -0,0 +1,108 @@
+from collections import deque
+from enum import IntEnum
+from threading import Lock
+from typing import Callable, Optional
+
+
+class Priority(IntEnum):
+    """ Scheduling class of an outgoing request, most urgent first """
+
+    CONTROL = 0  # actuation, eg. 'Fluids:waterNow'
+    INTERACTIVE = 1  # queries a user is waiting for
+    BACKGROUND = 2  # telemetry collection
+
+
+class OutgoingRequest:
+    """ A line waiting in the scheduler to be written to the link """
+
+    __slots__ = ("line", "priority", "deadline", "on_sent", "on_expired")
+
+    line: bytes
+    priority: Priority
+    deadline: Optional[float]  # time.monotonic() after which nobody waits for the reply anymore
+    on_sent: Optional[Callable[[], None]]
+    on_expired: Optional[Callable[[], None]]
+
+    def __init__(self, line: bytes, priority: Priority = Priority.INTERACTIVE, deadline: Optional[float] = None,
+                 on_sent: Optional[Callable[[], None]] = None,
+                 on_expired: Optional[Callable[[], None]] = None) -> None:
+        self.line = line
+        self.priority = priority
+        self.deadline = deadline
+        self.on_sent = on_sent
+        self.on_expired = on_expired
+
+    def is_expired(self, now: float) -> bool:
+        return self.deadline is not None and self.deadline <= now
+
+
+class RequestScheduler:
+    """ Outgoing queue with a FIFO per priority class, served by weighted round-robin.
+
+    Within a round every class may send as many requests as its weight, more urgent classes first. A round ends when
+    no class that has requests waiting has any weight left. A saturated link therefore still serves control requests
+    first and never starves background telemetry.
+    """
+
+    DEFAULT_WEIGHTS: dict[Priority, int] = {
+        Priority.CONTROL: 4,
+        Priority.INTERACTIVE: 2,
+        Priority.BACKGROUND: 1,
+    }
+
+    _weights: dict[Priority, int]
+    _credits: dict[Priority, int]
+    _queues: dict[Priority, deque[OutgoingRequest]]
+    _lock: Lock
+
+    def __init__(self, weights: Optional[dict[Priority, int]] = None) -> None:
+        self._weights = dict(self.DEFAULT_WEIGHTS if weights is None else weights)
+        self._credits = dict(self._weights)
+        self._queues = {priority: deque() for priority in Priority}
+        self._lock = Lock()
+
+    def put(self, request: OutgoingRequest) -> None:
+        with self._lock:
+            self._queues[request.priority].append(request)
+
+    def peek(self) -> Optional[OutgoingRequest]:
+        """ The request that pop() will return next, or None when nothing is waiting """
+        with self._lock:
+            priority = self._next_priority()
+            return self._queues[priority][0] if priority is not None else None
+
+    def pop(self) -> Optional[OutgoingRequest]:
+        with self._lock:
+            priority = self._next_priority()
+            if priority is None:
+                return None
+            self._credits[priority] -= 1
+            return self._queues[priority].popleft()
+
+    def drop_expired(self, now: float) -> list[OutgoingRequest]:
+        """ Remove and return all requests whose deadline has passed """
+        expired = []
+        with self._lock:
+            for priority, queue in self._queues.items():
+                if any(request.is_expired(now) for request in queue):
+                    expired.extend(request for request in queue if request.is_expired(now))
+                    self._queues[priority] = deque(request for request in queue if not request.is_expired(now))
+        return expired
+
+    def empty(self) -> bool:
+        with self._lock:
+            return not any(self._queues.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _next_priority(self) -> Optional[Priority]:
+        waiting = [priority for priority in Priority if self._queues[priority]]
+        if not waiting:
+            return None
+        for priority in waiting:
+            if self._credits[priority] > 0:
+                return priority
+        self._credits = dict(self._weights)  # every waiting class spent its share, start a new round
+        return waiting[0]
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+CacheKey = tuple[str, Optional[str], tuple[str, ...]]
+
+
+class ResponseCache:
+    """ Bounded LRU cache of responses to read-only queries, where every entry expires after the ttl of its command """
+
+    _ttls: dict[tuple[str, str], float]
+    _max_entries: int
+
+    _lock: Lock
+    _entries: OrderedDict[CacheKey, tuple[float, Any]]
+
+    _hits: int = 0
+    _misses: int = 0
+    _evictions: int = 0
+    _invalidations: int = 0
+
+    def __init__(self, ttls: dict[tuple[str, str], float], max_entries: int = 256) -> None:
+        self._ttls = dict(ttls)
+        self._max_entries = max_entries
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(module: str, command: Optional[str], args: Optional[list[str]]) -> CacheKey:
+        return module, command, tuple(args) if args else ()
+
+    def is_cacheable(self, module: str, command: Optional[str]) -> bool:
+        return self._ttls.get((module, command), 0.0) > 0.0
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        ttl = self._ttls.get(key[:2], 0.0)
+        if ttl <= 0.0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate_module(self, module: str) -> None:
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == module]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+
+    def statistics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "size": len(self._entries),
+            }
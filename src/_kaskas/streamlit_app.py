@@ -18,6 +18,7 @@ from _kaskas.pyro_server import PyroServer
 from _kaskas.utils.filelock import FileLock
 from _kaskas.datacollector import TimeSeriesCollector
 from _kaskas.kaskas_api import KasKasAPI
+from _kaskas.utils.proxy_pool import ProxyPool
 
 st.set_page_config(page_title="KasKas !", page_icon="🌱", layout="wide")
 
@@ -86,6 +87,11 @@ def get_camera() -> Camera:
     return Camera()
 
 
+@st.cache_resource
+def get_proxy_pool() -> ProxyPool:
+    return ProxyPool()  # shared by all sessions and reruns, so the API is looked up and connected to only once
+
+
 @st.cache_resource(ttl=timedelta(seconds=1))
 def map(_api: KasKasAPI | PyroServer.Proxy) -> dict[str, str]:
     queries = {
@@ -274,6 +280,10 @@ def load_page(root: Path, api: KasKasAPI | PyroServer.Proxy):
         with st.expander("API", expanded=True):
             display_api_panel(api)
 
+        # Firmware log, straight from the daemon's memory
+        with st.expander("Firmware Log", expanded=False):
+            display_log_panel(api)
+
         # Detailed data view at the bottom
         with st.expander("Detailed Data View", expanded=False):
             st.dataframe(df, use_container_width=True)
@@ -281,9 +291,14 @@ def load_page(root: Path, api: KasKasAPI | PyroServer.Proxy):
 
 def display_water_panel(api: KasKasAPI | PyroServer.Proxy):
     """Display the water panel with controls and information."""
-    out_of_water = api.request(module="Fluids", command="isOutOfWater", args=[""]).arguments[0] == "True"
-    injection_effect = api.request(module="Fluids", command="injectionEffect", args=[""]).arguments[0]
-    time_since_last_dosis = api.request(module="Fluids", command="timeSinceLastDosis", args=["h"]).arguments[0]
+    out_of_water, injection_effect, time_since_last_dosis = api.request_many([
+        ("Fluids", "isOutOfWater", [""]),
+        ("Fluids", "injectionEffect", [""]),
+        ("Fluids", "timeSinceLastDosis", ["h"]),
+    ])
+    out_of_water = bool(out_of_water.values) and out_of_water.values[0] is True
+    injection_effect = injection_effect.values[0] if injection_effect.values else None
+    time_since_last_dosis = time_since_last_dosis.values[0] if time_since_last_dosis.values else None
 
     with st.container(border=True):
         st.markdown(
@@ -320,18 +335,32 @@ def display_api_panel(api: KasKasAPI | PyroServer.Proxy):
             response = api.request("?", "?")
         else:
             module, command, *args = chat_input.split(":")
-            args = ":".join(args)
+            args = ":".join(args).split("|") if args else None
             response = api.request(module, command, args)
         st.session_state.messages.append(f"> {chat_input} -> {response.__repr__()}")
     for message in st.session_state.messages:
         st.code(message)
 
 
-def do_streamlit_session(root: Path, api_id: str):
+def display_log_panel(api: KasKasAPI | PyroServer.Proxy, limit: int = 50):
+    """Display the most recent firmware log lines."""
+    records = api.recent_logs(limit=limit)
+    if not records:
+        st.info("No log lines received yet.")
+        return
+    st.code("\n".join(f"{datetime.fromtimestamp(record['time']):%H:%M:%S} {record['level']:<5} {record['text']}"
+                      for record in records))
+
+
+def do_streamlit_session(root: Path, api_id: str, api_socket: Optional[Path] = typer.Argument(None)):
     """Run the Streamlit session."""
 
     Logger.debug("Client connected")
 
+    # the daemon runs on this host, over its Unix domain socket the API is reached without nameserver lookup
+    address = PyroServer.unix_address(api_socket, api_id) if api_socket and PyroServer.is_serving(api_socket) \
+        else f"PYRONAME:{api_id}"
+
     auth_file: Optional[Path] = root / "auth.yml" if (root / "auth.yml").exists() else None
 
     if auth_file:
@@ -341,12 +370,12 @@ def do_streamlit_session(root: Path, api_id: str):
 
         if st.session_state["authentication_status"]:
             Logger.debug("Session authenticated.")
-            api = PyroServer.proxy_for(f"PYRONAME:{api_id}")
+            api = get_proxy_pool().handle(address)
             load_page(root, api)
     else:
         # Initialize API with provided api_id
         Logger.debug("No authentication: no authorization file was provided.")
-        api = PyroServer.proxy_for(f"PYRONAME:{api_id}")
+        api = get_proxy_pool().handle(address)
         load_page(root, api)
 
 
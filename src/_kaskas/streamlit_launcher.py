@@ -30,13 +30,18 @@ class StreamlitLauncher:
 
     _root: Path
     _api: KasKasAPI | Pyro5.api.Proxy
+    _api_name: str
+    _api_socket: Optional[Path]
 
-    def __init__(self, root: Path, api: KasKasAPI | Pyro5.api.Proxy) -> None:
+    def __init__(self, root: Path, api: KasKasAPI | Pyro5.api.Proxy,
+                 api_name: str = KasKasAPI.cannonical_name(), api_socket: Optional[Path] = None) -> None:
         self._flag_shutdown = Event()
         self._flag_up_and_running = Event()
         self._thread = Thread(target=self._runner)
         self._root = root
         self._api = api
+        self._api_name = api_name
+        self._api_socket = api_socket  # the app reaches the API over this Unix domain socket when given
 
     @property
     def is_started(self) -> bool:
@@ -68,7 +73,7 @@ class StreamlitLauncher:
         app_filepath = script_dir / "streamlit_app.py"
 
         log.debug(
-            f"Streamlit launcher; starting memory_guard and executing: 'python {str(self._root)} {str(app_filepath)} {str(self._root)} {KasKasAPI.cannonical_name()}'")
+            f"Streamlit launcher; starting memory_guard and executing: 'python {str(self._root)} {str(app_filepath)} {str(self._root)} {self._api_name}'")
 
         from subprocess import Popen, PIPE, STDOUT
         streamlit_memoryguard = Popen(["bash", str(memory_guard_filepath)],
@@ -76,7 +81,8 @@ class StreamlitLauncher:
         streamlit = Popen(
             ["streamlit", "run", "--browser.gatherUsageStats", "false", "--server.headless", "true", str(app_filepath),
              str(self._root),
-             KasKasAPI.cannonical_name()],
+             self._api_name,
+             *([str(self._api_socket)] if self._api_socket is not None else [])],
             stdout=PIPE, stderr=STDOUT, encoding='utf-8')
         self._flag_up_and_running.set()
 
@@ -0,0 +1,208 @@
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Event, Lock, Thread
+from typing import Any, Callable, Optional
+
+from _kaskas.log import log
+from _kaskas.request_scheduler import Priority
+
+Topic = tuple[str, str, tuple[str, ...]]
+
+
+class Subscription:
+    """ A subscriber to the values of a single topic, delivered to a callback object or kept in a local queue """
+
+    __slots__ = ("id", "topic", "interval", "callback", "queue", "failures", "delivering", "leased_until")
+
+    id: str
+    topic: Topic
+    interval: float
+    callback: Optional[Any]  # object with an `on_value(subscription_id, response)` method, eg. a Pyro proxy
+    queue: deque
+    failures: int
+    delivering: bool  # a value is on its way to the callback
+    leased_until: float  # a subscription without callback is dropped when it is not polled by then
+
+    def __init__(self, topic: Topic, interval: float, callback: Optional[Any], queue_size: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.topic = topic
+        self.interval = interval
+        self.callback = callback
+        self.queue = deque(maxlen=queue_size)
+        self.failures = 0
+        self.delivering = False
+        self.leased_until = float("inf")
+
+
+class SubscriptionManager:
+    """ Polls every subscribed topic once per interval and fans the responses out to all of its subscribers.
+
+    A topic is polled at the shortest interval any of its subscribers asked for, so the serial traffic of a topic
+    does not grow with the number of subscribers. All topics that are due are requested in a single batch.
+
+    A subscription without a callback is leased: when it is not polled for LEASE_INTERVALS of its intervals, and at
+    least LEASE_MIN seconds, its subscriber is assumed gone and the subscription is dropped.
+
+    Callbacks are called on a small pool of threads, at most one call per subscriber at a time, and Pyro callbacks
+    time out after CALLBACK_TIMEOUT seconds. A subscriber that fails, times out or is still busy with the previous value
+    MAX_CALLBACK_FAILURES times in a row is dropped, so a hung subscriber delays neither polling nor anyone else.
+    """
+
+    MAX_CALLBACK_FAILURES = 3
+    CALLBACK_TIMEOUT = 5.0
+    CALLBACK_WORKERS = 4
+    LEASE_INTERVALS = 5
+    LEASE_MIN = 60.0
+
+    _flag_shutdown: Event
+    _thread: Optional[Thread]
+    _executor: ThreadPoolExecutor
+
+    _request_many: Callable[..., list]
+    _is_running: Callable[[], bool]
+    _queue_size: int
+
+    _lock: Lock
+    _delivered: Condition
+    _subscriptions: dict[str, Subscription]
+    _next_poll: dict[Topic, float]
+
+    def __init__(self, request_many: Callable[..., list], is_running: Callable[[], bool], queue_size: int = 64):
+        self._flag_shutdown = Event()
+        self._thread = None
+        self._executor = ThreadPoolExecutor(max_workers=self.CALLBACK_WORKERS, thread_name_prefix="subscriptions")
+        self._request_many = request_many
+        self._is_running = is_running
+        self._queue_size = queue_size
+        self._lock = Lock()
+        self._delivered = Condition(self._lock)
+        self._subscriptions = {}
+        self._next_poll = {}
+
+    def subscribe(self, module: str, command: str, args: Optional[list[str]] = None, interval: float = 10.0,
+                  callback: Optional[Any] = None) -> str:
+        topic = (module, command, tuple(args) if args else ())
+        subscription = Subscription(topic, interval, callback, self._queue_size)
+        if hasattr(callback, "_pyroTimeout"):
+            callback._pyroTimeout = self.CALLBACK_TIMEOUT  # Pyro waits forever by default
+        if callback is None:
+            self._renew(subscription, time.monotonic())
+        with self._lock:
+            self._subscriptions[subscription.id] = subscription
+            self._next_poll.setdefault(topic, time.monotonic())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._runner)
+                self._thread.start()
+        log.debug(f"Subscriptions: {subscription.id} subscribed to {module}:{command} every {interval}s")
+        return subscription.id
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        with self._lock:
+            return self._remove(subscription_id) is not None
+
+    def poll(self, subscription_id: str, timeout: Optional[float] = None, limit: Optional[int] = None) -> list:
+        """ Take the responses queued for a subscription without a callback, waiting up to timeout for the first """
+        with self._delivered:
+            subscription = self._subscriptions.get(subscription_id)
+            if subscription is None:
+                raise KeyError(f"Unknown subscription: {subscription_id}")
+            # the lease runs from the end of the wait, so a long poll does not expire it
+            self._renew(subscription, time.monotonic() + (float("inf") if timeout is None else timeout))
+            self._delivered.wait_for(lambda: subscription.queue or subscription.id not in self._subscriptions,
+                                     timeout=timeout)
+            self._renew(subscription, time.monotonic())
+            amount = len(subscription.queue) if limit is None else min(limit, len(subscription.queue))
+            return [subscription.queue.popleft() for _ in range(amount)]
+
+    def stop(self, blocking: bool = False) -> None:
+        self._flag_shutdown.set()
+        if blocking and self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown(wait=blocking)
+
+    def _renew(self, subscription: Subscription, since: float) -> None:
+        subscription.leased_until = since + max(self.LEASE_MIN, self.LEASE_INTERVALS * subscription.interval)
+
+    def _remove(self, subscription_id: str) -> Optional[Subscription]:
+        subscription = self._subscriptions.pop(subscription_id, None)
+        if subscription is not None and not self._subscribers_of(subscription.topic):
+            del self._next_poll[subscription.topic]
+        self._delivered.notify_all()
+        return subscription
+
+    def _expire_leases(self, now: float) -> None:
+        expired = [subscription for subscription in self._subscriptions.values() if subscription.leased_until <= now]
+        for subscription in expired:
+            log.info(f"Subscriptions: dropping {subscription.id}, it was not polled within its lease")
+            self._remove(subscription.id)
+
+    def _subscribers_of(self, topic: Topic) -> list[Subscription]:
+        return [subscription for subscription in self._subscriptions.values() if subscription.topic == topic]
+
+    def _runner(self):
+        while not self._flag_shutdown.is_set() and self._is_running():
+            now = time.monotonic()
+            with self._lock:
+                self._expire_leases(now)
+                due = [topic for topic, next_poll in self._next_poll.items() if next_poll <= now]
+                for topic in due:
+                    self._next_poll[topic] = now + min(subscriber.interval for subscriber in self._subscribers_of(topic))
+                next_wakeup = min(self._next_poll.values(), default=now + 1.0)
+
+            if due:
+                try:
+                    responses = self._request_many(due, priority=Priority.BACKGROUND)
+                except Exception as e:
+                    log.warning(f"Subscriptions: failed to poll {len(due)} topic(s): {e}")
+                    continue
+                for topic, response in zip(due, responses):
+                    self._fan_out(topic, response)
+                continue
+
+            self._flag_shutdown.wait(timeout=min(1.0, max(0.0, next_wakeup - now)))
+
+    def _fan_out(self, topic: Topic, response: Any) -> None:
+        with self._lock:
+            subscribers = self._subscribers_of(topic)
+            for subscription in subscribers:
+                if subscription.callback is None:
+                    subscription.queue.append(response)
+            self._delivered.notify_all()
+
+        for subscription in subscribers:
+            if subscription.callback is None:
+                continue
+            with self._lock:
+                busy = subscription.delivering
+                subscription.delivering = True
+            if busy:
+                self._failed(subscription, "still busy with the previous value")
+                continue
+            try:
+                self._executor.submit(self._notify, subscription, response)
+            except RuntimeError:
+                return  # shutting down
+
+    def _notify(self, subscription: Subscription, response: Any) -> None:
+        try:
+            if hasattr(subscription.callback, "_pyroClaimOwnership"):
+                subscription.callback._pyroClaimOwnership()  # the proxy is used by another thread than before
+            subscription.callback.on_value(subscription.id, response)
+            with self._lock:
+                subscription.failures = 0
+        except Exception as e:
+            self._failed(subscription, e)
+        finally:
+            with self._lock:
+                subscription.delivering = False
+
+    def _failed(self, subscription: Subscription, reason: Any) -> None:
+        with self._lock:
+            subscription.failures += 1
+            failures = subscription.failures
+        log.warning(f"Subscriptions: delivery to {subscription.id} failed ({failures}): {reason}")
+        if failures >= self.MAX_CALLBACK_FAILURES:
+            log.warning(f"Subscriptions: dropping unresponsive subscriber {subscription.id}")
+            self.unsubscribe(subscription.id)
@@ -0,0 +1,70 @@
+"""Test cases for the binary dialect."""
+import struct
+
+import pytest
+
+from _kaskas.binary_dialect import BinaryDialect
+from _kaskas.utils.cobs import seal, unseal
+
+DIALECT = BinaryDialect({("Fluids", "isOutOfWater"): 1, ("Fluids", "waterNow"): 2, ("DAQ", "getTimeSeries"): 10})
+
+
+def reply(command_id: int, status: int = 0, values: bytes = b"", request_id: int = BinaryDialect.NO_REQUEST_ID,
+          frame_type: int = BinaryDialect.FRAME_REPLY) -> bytes:
+    return seal(struct.pack("<BHHB", frame_type, request_id, command_id, status) + values)
+
+
+def test_handshake_reply_defines_the_command_table():
+    dialect = BinaryDialect.from_handshake(["1", "Fluids:isOutOfWater=1", "Fluids:waterNow=2"])
+    assert dialect.command_ids == {("Fluids", "isOutOfWater"): 1, ("Fluids", "waterNow"): 2}
+    assert dialect.supports("Fluids", "waterNow")
+    assert not dialect.supports("Fluids", "injectionEffect")
+
+
+@pytest.mark.parametrize("arguments", [[], ["2"], ["1", "Fluids=1"], ["1", "Fluids:waterNow=x"]])
+def test_unusable_handshake_reply_is_rejected(arguments):
+    with pytest.raises(ValueError):
+        BinaryDialect.from_handshake(arguments)
+
+
+def test_request_frame_packs_arguments():
+    frame = DIALECT.format_request("Fluids", "waterNow", ["250", "1.5", "true", "fast", ""], request_id=7,
+                                   types=["int", "float", "bool", "str"])
+    assert frame[0] == frame[-1] == BinaryDialect.FRAME_DELIMITER
+    assert 0 not in frame[1:-1]
+    payload = unseal(frame[1:-1])
+    assert payload == (struct.pack("<BHH", BinaryDialect.FRAME_REQUEST, 7, 2)
+                       + b"i" + struct.pack("<i", 250) + b"f" + struct.pack("<f", 1.5) + b"b\x01" + b"s\x04fast")
+
+
+def test_request_argument_too_long_is_rejected():
+    with pytest.raises(ValueError):
+        DIALECT.format_request("Fluids", "waterNow", ["x" * 256])
+
+
+def test_reply_frame_parses_to_its_text_line():
+    values = b"b\x01" + b"i" + struct.pack("<i", -3) + b"f" + struct.pack("<f", 0.25) + b"s\x02ok"
+    assert DIALECT.parse_reply(reply(1, values=values, request_id=12)) == "Fluids<OK:True|-3|0.25|ok~12"
+    assert DIALECT.parse_reply(reply(2, status=1)) == "Fluids<BAD_INPUT:"
+
+
+def test_reply_frame_with_newline_and_many_values():
+    values = b"".join(b"i" + struct.pack("<i", 10) for _ in range(100))  # 10 == 0x0A, more than a COBS block
+    frame = reply(10, values=values, request_id=0x0A0A)
+    assert len(frame) > 254
+    assert DIALECT.parse_reply(frame) == "DAQ<OK:" + "|".join(["10"] * 100) + "~2570"
+
+
+@pytest.mark.parametrize("frame", [
+    reply(1)[:-1],  # truncated
+    bytes([reply(1)[0]]) + bytes([reply(1)[1] ^ 0x01]) + reply(1)[2:],  # corrupt
+    reply(99),  # unknown command
+    reply(1, status=len(BinaryDialect.STATUSES)),
+    reply(1, frame_type=BinaryDialect.FRAME_REQUEST),
+    reply(1, values=b"i\x01\x02"),  # truncated value
+    reply(1, values=b"x"),  # unknown value tag
+    seal(b"\x02\x01"),  # too short for a header
+])
+def test_corrupt_reply_frame_is_rejected(frame):
+    with pytest.raises(ValueError):
+        DIALECT.parse_reply(frame)
@@ -0,0 +1,68 @@
+"""Test cases for the command schema."""
+from _kaskas.command_schema import CommandSchema
+
+USAGE = """KasKas firmware
+version: 1.4.0
+Fluids
+  isOutOfWater -> bool
+  waterNow(ml: float) -> bool
+  timeSinceLastDosis(unit?: str) -> float
+Clock:setTime(int, int) -> bool  # hours, minutes
+DAQ:getTimeSeries
+"""
+
+
+def test_parse_indexes_declared_commands():
+    schema = CommandSchema.parse(USAGE)
+    assert schema.version == "1.4.0"
+    assert schema.key == "1.4.0"
+
+    water_now = schema.spec_for("Fluids", "waterNow")
+    assert [(argument.name, argument.type, argument.optional) for argument in water_now.arguments] == [
+        ("ml", "float", False)]
+    assert water_now.returns == ["bool"]
+    assert schema.spec_for("Fluids", "timeSinceLastDosis").arguments[0].optional
+    assert [argument.type for argument in schema.spec_for("Clock", "setTime").arguments] == ["int", "int"]
+    assert schema.spec_for("Fluids", "isOutOfWater").arguments is None
+    assert schema.spec_for("DAQ", "getTimeSeries").arguments is None
+    assert schema.spec_for("KasKas", "firmware") is None  # not a declaration
+
+
+def test_key_without_version_hashes_the_usage():
+    assert CommandSchema.parse("Fluids:waterNow(float)").key == CommandSchema.parse("Fluids:waterNow(float)").key
+    assert CommandSchema.parse("Fluids:waterNow(float)").key != CommandSchema.parse("Fluids:waterNow(int)").key
+
+
+def test_validate_checks_arguments_of_parsed_commands():
+    schema = CommandSchema.parse(USAGE)
+    assert schema.validate("Fluids", "waterNow", ["10.5"]) is None
+    assert "takes 1 argument(s), got 0" in schema.validate("Fluids", "waterNow", None)
+    assert "must be float" in schema.validate("Fluids", "waterNow", ["lots"])
+    assert schema.validate("Fluids", "timeSinceLastDosis", []) is None
+    assert schema.validate("Fluids", "timeSinceLastDosis", ["s", ""]) is None  # trailing empty arguments are ignored
+    assert "takes 0 to 1" in schema.validate("Fluids", "timeSinceLastDosis", ["s", "m"])
+    assert schema.validate("Fluids", "isOutOfWater", ["anything"]) is None  # no argument list to check against
+
+
+def test_unknown_commands_pass_through_to_the_firmware():
+    schema = CommandSchema.parse("Fluids:isOutOfWater\nFluids:waterNow:<ml:float>")
+    assert schema.validate("Fluids", "waterNow", ["10"]) is None
+    assert schema.validate("Fluids", "injectionEffect", None) is None
+    assert schema.validate("Lights", "on", ["1"]) is None
+
+
+def test_decode_uses_return_types_or_inference():
+    schema = CommandSchema.parse(USAGE)
+    assert schema.decode("Fluids", "waterNow", ["1"]) == [True]
+    assert schema.decode("Fluids", "timeSinceLastDosis", ["3"]) == [3.0]
+    assert schema.decode("DAQ", "getTimeSeries", ["3", "2.5", "true", "abc"]) == [3, 2.5, True, "abc"]
+    assert schema.decode("Fluids", "waterNow", None) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    schema = CommandSchema.parse(USAGE)
+    path = schema.save(tmp_path)
+    loaded = CommandSchema.load(path)
+    assert loaded.key == schema.key
+    assert loaded.as_dict() == schema.as_dict()
+    assert CommandSchema.load_latest(tmp_path).key == schema.key
@@ -0,0 +1,104 @@
+"""Test cases for the pending request table."""
+import time
+
+from _kaskas.pending_requests import PendingRequestTable
+
+
+def sent(table: PendingRequestTable, module: str, command: str):
+    entry = table.register(module, command)
+    table.mark_sent(entry)
+    return entry
+
+
+def test_replies_match_oldest_request_for_module():
+    table = PendingRequestTable()
+    first = sent(table, "DAQ", "getTimeSeries")
+    other = sent(table, "Fluids", "isOutOfWater")
+    second = sent(table, "DAQ", "getTimeSeries")
+
+    table.resolve("Fluids<OK:True")
+    table.resolve("DAQ<OK:1")
+    table.resolve("DAQ<OK:2")
+
+    assert other.future.result(0) == "Fluids<OK:True"
+    assert first.future.result(0) == "DAQ<OK:1"
+    assert second.future.result(0) == "DAQ<OK:2"
+    assert table.outstanding == 0
+
+
+def test_late_reply_is_consumed_by_abandoned_request():
+    table = PendingRequestTable()
+    late = sent(table, "DAQ", "getTimeSeries")
+    table.abandon(late)
+    following = sent(table, "DAQ", "getTimeSeries")
+
+    table.resolve("DAQ<OK:late")
+    assert not following.future.done()
+    table.resolve("DAQ<OK:following")
+    assert following.future.result(0) == "DAQ<OK:following"
+
+
+def test_lost_reply_does_not_stall_the_module():
+    table = PendingRequestTable()
+    lost = sent(table, "DAQ", "getTimeSeries")
+    table.abandon(lost)  # its reply never comes
+
+    # the next reply is taken for the late reply of the abandoned request, so this request times out as well ..
+    displaced = sent(table, "DAQ", "getTimeSeries")
+    table.resolve("DAQ<OK:1")
+    assert not displaced.future.done()
+    table.abandon(displaced)
+
+    # .. but it does not absorb the reply of the request after it in turn
+    for value in range(2, 5):
+        entry = sent(table, "DAQ", "getTimeSeries")
+        table.resolve(f"DAQ<OK:{value}")
+        assert entry.future.result(0) == f"DAQ<OK:{value}"
+    assert table.outstanding == 0
+
+
+def test_abandoned_request_absorbs_only_within_grace():
+    table = PendingRequestTable(abandon_grace=0.01)
+    lost = sent(table, "DAQ", "getTimeSeries")
+    table.abandon(lost)
+    time.sleep(0.02)
+
+    entry = sent(table, "DAQ", "getTimeSeries")
+    table.resolve("DAQ<OK:1")
+    assert entry.future.result(0) == "DAQ<OK:1"
+
+
+def test_request_ids_are_only_split_off_when_in_use():
+    table = PendingRequestTable()
+    entry = sent(table, "Clock", "time")
+    table.resolve("Clock<OK:12:00~30")
+    assert entry.future.result(0) == "Clock<OK:12:00~30"
+
+    table = PendingRequestTable(use_request_ids=True)
+    first = sent(table, "Clock", "time")
+    second = sent(table, "Clock", "time")
+    table.resolve(f"Clock<OK:b~{second.request_id}")
+    table.resolve(f"Clock<OK:a~{first.request_id}")
+    assert first.future.result(0) == "Clock<OK:a"
+    assert second.future.result(0) == "Clock<OK:b"
+
+
+def test_reply_with_unknown_id_is_dropped():
+    table = PendingRequestTable(use_request_ids=True)
+    entry = sent(table, "Clock", "time")
+    table.abandon(entry)
+    following = sent(table, "Clock", "time")
+
+    table.resolve(f"Clock<OK:late~{entry.request_id}")
+    assert not following.future.done()
+
+
+def test_lost_link_fails_only_sent_requests():
+    table = PendingRequestTable()
+    lost = sent(table, "DAQ", "getTimeSeries")
+    queued = table.register("DAQ", "getTimeSeries")
+
+    table.fail_sent()
+    assert isinstance(lost.future.exception(0), ConnectionError)
+    assert not queued.future.done()
+    assert table.outstanding == 1
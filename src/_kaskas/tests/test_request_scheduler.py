@@ -0,0 +1,63 @@
+"""Test cases for the request scheduler."""
+from _kaskas.request_scheduler import OutgoingRequest, Priority, RequestScheduler
+
+
+def fill(scheduler: RequestScheduler, priority: Priority, amount: int, deadline=None) -> None:
+    for index in range(amount):
+        scheduler.put(OutgoingRequest(f"{priority.name}:{index}\n".encode(), priority=priority, deadline=deadline))
+
+
+def drain(scheduler: RequestScheduler) -> list[Priority]:
+    order = []
+    while (request := scheduler.pop()) is not None:
+        order.append(request.priority)
+    return order
+
+
+def test_requests_of_a_class_keep_their_order():
+    scheduler = RequestScheduler()
+    fill(scheduler, Priority.INTERACTIVE, 3)
+    assert [scheduler.pop().line for _ in range(3)] == [b"INTERACTIVE:0\n", b"INTERACTIVE:1\n", b"INTERACTIVE:2\n"]
+    assert scheduler.pop() is None
+    assert scheduler.empty()
+
+
+def test_saturated_link_is_shared_by_weight():
+    scheduler = RequestScheduler()
+    for priority in Priority:
+        fill(scheduler, priority, 10)
+    order = drain(scheduler)
+    assert order[:7] == [Priority.CONTROL] * 4 + [Priority.INTERACTIVE] * 2 + [Priority.BACKGROUND]
+    assert order[7:14] == order[:7]
+    assert len(order) == 30
+
+
+def test_background_is_not_starved():
+    scheduler = RequestScheduler()
+    fill(scheduler, Priority.BACKGROUND, 1)
+    fill(scheduler, Priority.CONTROL, 20)
+    assert Priority.BACKGROUND in drain(scheduler)[:5]
+
+
+def test_peek_returns_what_pop_returns():
+    scheduler = RequestScheduler()
+    fill(scheduler, Priority.BACKGROUND, 1)
+    fill(scheduler, Priority.CONTROL, 1)
+    assert scheduler.peek() is scheduler.peek()
+    request = scheduler.peek()
+    assert request.priority == Priority.CONTROL
+    assert scheduler.pop() is request
+    assert len(scheduler) == 1
+
+
+def test_expired_requests_are_dropped():
+    scheduler = RequestScheduler()
+    fill(scheduler, Priority.INTERACTIVE, 2, deadline=10.0)
+    fill(scheduler, Priority.INTERACTIVE, 1, deadline=20.0)
+    fill(scheduler, Priority.BACKGROUND, 1)
+
+    assert scheduler.drop_expired(5.0) == []
+    expired = scheduler.drop_expired(10.0)
+    assert [request.line for request in expired] == [b"INTERACTIVE:0\n", b"INTERACTIVE:1\n"]
+    assert len(scheduler) == 2
+    assert scheduler.pop().line == b"INTERACTIVE:0\n"  # the one with the later deadline
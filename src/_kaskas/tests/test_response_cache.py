@@ -0,0 +1,68 @@
+"""Test cases for the response cache."""
+import time
+
+from _kaskas.response_cache import ResponseCache
+
+TTLS = {("Fluids", "isOutOfWater"): 60.0, ("Clock", "time"): 0.01, ("DAQ", "getTimeSeries"): 60.0}
+
+
+def test_only_commands_with_a_ttl_are_cached():
+    cache = ResponseCache(TTLS)
+    assert cache.is_cacheable("Fluids", "isOutOfWater")
+    assert not cache.is_cacheable("Fluids", "waterNow")
+
+    cache.put(ResponseCache.key("Fluids", "waterNow", ["100"]), "done")
+    assert cache.get(ResponseCache.key("Fluids", "waterNow", ["100"])) is None
+    assert cache.statistics()["size"] == 0
+
+
+def test_entries_are_keyed_by_arguments():
+    cache = ResponseCache(TTLS)
+    cache.put(ResponseCache.key("DAQ", "getTimeSeries", ["a"]), "series a")
+    assert cache.get(ResponseCache.key("DAQ", "getTimeSeries", ["a"])) == "series a"
+    assert cache.get(ResponseCache.key("DAQ", "getTimeSeries", ["b"])) is None
+    assert ResponseCache.key("DAQ", "getTimeSeries", None) == ResponseCache.key("DAQ", "getTimeSeries", [])
+    assert cache.statistics()["hits"] == 1
+    assert cache.statistics()["misses"] == 1
+
+
+def test_entries_expire_after_their_ttl():
+    cache = ResponseCache(TTLS)
+    key = ResponseCache.key("Clock", "time", None)
+    cache.put(key, "12:00")
+    assert cache.get(key) == "12:00"
+    time.sleep(0.02)
+    assert cache.get(key) is None
+    assert cache.statistics()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(TTLS, max_entries=2)
+    first, second, third = (ResponseCache.key("DAQ", "getTimeSeries", [name]) for name in "abc")
+    cache.put(first, 1)
+    cache.put(second, 2)
+    cache.get(first)  # now second is the least recently used
+    cache.put(third, 3)
+    assert cache.get(second) is None
+    assert cache.get(first) == 1
+    assert cache.get(third) == 3
+    assert cache.statistics()["evictions"] == 1
+
+
+def test_invalidate_module_drops_only_its_entries():
+    cache = ResponseCache(TTLS)
+    cache.put(ResponseCache.key("Fluids", "isOutOfWater", None), False)
+    cache.put(ResponseCache.key("DAQ", "getTimeSeries", ["a"]), "series a")
+    cache.invalidate_module("Fluids")
+    assert cache.get(ResponseCache.key("Fluids", "isOutOfWater", None)) is None
+    assert cache.get(ResponseCache.key("DAQ", "getTimeSeries", ["a"])) == "series a"
+    assert cache.statistics()["invalidations"] == 1
+
+
+def test_clear_drops_all_entries():
+    cache = ResponseCache(TTLS)
+    cache.put(ResponseCache.key("Fluids", "isOutOfWater", None), False)
+    cache.put(ResponseCache.key("DAQ", "getTimeSeries", ["a"]), "series a")
+    cache.clear()
+    assert cache.statistics()["size"] == 0
+    assert cache.statistics()["invalidations"] == 2
@@ -0,0 +1,78 @@
+"""Test cases for the subscription manager."""
+import threading
+import time
+
+from _kaskas.subscriptions import SubscriptionManager
+
+
+def manager() -> SubscriptionManager:
+    subscriptions = SubscriptionManager(request_many=lambda topics, priority: [topic[1] for topic in topics],
+                                        is_running=lambda: True)
+    subscriptions.LEASE_MIN = 0.0
+    subscriptions.LEASE_INTERVALS = 5
+    return subscriptions
+
+
+def test_polled_subscription_keeps_receiving():
+    subscriptions = manager()
+    try:
+        subscription_id = subscriptions.subscribe("DAQ", "getTimeSeries", interval=0.05)
+        received = []
+        deadline = time.monotonic() + 0.6
+        while time.monotonic() < deadline:
+            received += subscriptions.poll(subscription_id, timeout=0.1)
+        assert len(received) >= 3
+        assert set(received) == {"getTimeSeries"}
+    finally:
+        subscriptions.stop(blocking=True)
+
+
+def test_unpolled_subscription_expires():
+    subscriptions = manager()
+    try:
+        subscription_id = subscriptions.subscribe("DAQ", "getTimeSeries", interval=0.05)
+        time.sleep(1.5)  # the runner checks leases at least once a second
+        assert not subscriptions.unsubscribe(subscription_id)
+    finally:
+        subscriptions.stop(blocking=True)
+
+
+def test_subscription_with_callback_does_not_expire():
+    class Receiver:
+        def on_value(self, subscription_id, response):
+            pass
+
+    subscriptions = manager()
+    try:
+        subscription_id = subscriptions.subscribe("DAQ", "getTimeSeries", interval=0.05, callback=Receiver())
+        time.sleep(1.5)
+        assert subscriptions.unsubscribe(subscription_id)
+    finally:
+        subscriptions.stop(blocking=True)
+
+
+def test_hung_subscriber_delays_nobody_and_is_dropped():
+    release = threading.Event()
+
+    class Hung:
+        def on_value(self, subscription_id, response):
+            release.wait()
+
+    class Receiver:
+        def __init__(self):
+            self.values = []
+
+        def on_value(self, subscription_id, response):
+            self.values.append(response)
+
+    subscriptions = manager()
+    try:
+        receiver = Receiver()
+        hung_id = subscriptions.subscribe("DAQ", "getTimeSeries", interval=0.05, callback=Hung())
+        subscriptions.subscribe("DAQ", "getTimeSeries", interval=0.05, callback=receiver)
+        time.sleep(0.5)
+        assert len(receiver.values) >= 5
+        assert not subscriptions.unsubscribe(hung_id)  # busy with its first value for three intervals in a row
+    finally:
+        release.set()
+        subscriptions.stop(blocking=True)
@@ -0,0 +1,54 @@
+import binascii
+import struct
+
+
+def cobs_encode(data: bytes) -> bytes:
+    """ Consistent Overhead Byte Stuffing: encode data such that it contains no zero bytes """
+    encoded = bytearray()
+    for block in bytes(data).split(b"\0"):
+        while len(block) >= 0xFE:  # a full block carries 254 bytes and no implicit zero
+            encoded.append(0xFF)
+            encoded += block[:0xFE]
+            block = block[0xFE:]
+        encoded.append(len(block) + 1)
+        encoded += block
+    return bytes(encoded)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    """ Inverse of cobs_encode, raises ValueError on malformed input """
+    decoded = bytearray()
+    index = 0
+    while index < len(data):
+        code = data[index]
+        if code == 0:
+            raise ValueError("COBS: unexpected zero byte")
+        end = index + code
+        if end > len(data):
+            raise ValueError("COBS: block exceeds input")
+        decoded += data[index + 1:end]
+        index = end
+        if code != 0xFF and index < len(data):
+            decoded.append(0)
+    return bytes(decoded)
+
+
+def crc16(data: bytes) -> int:
+    """ CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF) """
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def seal(payload: bytes) -> bytes:
+    """ Append the crc16 of payload and COBS encode both """
+    return cobs_encode(payload + struct.pack("<H", crc16(payload)))
+
+
+def unseal(encoded: bytes) -> bytes:
+    """ Inverse of seal, raises ValueError when the frame is malformed or its crc16 does not match """
+    decoded = cobs_decode(encoded)
+    if len(decoded) < 2:
+        raise ValueError("Frame too short to carry a crc16")
+    payload, (checksum,) = decoded[:-2], struct.unpack("<H", decoded[-2:])
+    if crc16(payload) != checksum:
+        raise ValueError(f"Frame crc16 mismatch: {crc16(payload):#06x} != {checksum:#06x}")
+    return payload
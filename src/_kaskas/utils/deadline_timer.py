@@ -0,0 +1,52 @@
+import heapq
+import logging
+import time
+from itertools import count
+from threading import Condition, Thread
+from typing import Callable, Optional
+
+
+log = logging.getLogger(__name__)
+
+
+class DeadlineTimer:
+    """ Runs callbacks at their deadline (time.monotonic()) on a single thread, however many are scheduled """
+
+    _thread: Optional[Thread]
+    _is_running: Callable[[], bool]
+
+    _condition: Condition
+    _heap: list[tuple[float, int, Callable[[], None]]]
+    _sequence: count
+
+    def __init__(self, is_running: Callable[[], bool] = lambda: True):
+        self._thread = None
+        self._is_running = is_running
+        self._condition = Condition()
+        self._heap = []
+        self._sequence = count()
+
+    def schedule(self, deadline: float, callback: Callable[[], None]) -> None:
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._sequence), callback))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._runner)
+                self._thread.start()
+            self._condition.notify()
+
+    def _runner(self):
+        while self._is_running():
+            with self._condition:
+                if not self._heap:
+                    self._condition.wait(timeout=1.0)
+                    continue
+                deadline, _, callback = self._heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=min(1.0, delay))
+                    continue
+                heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception:
+                log.exception("DeadlineTimer: callback failed")
@@ -1,8 +1,14 @@
 import glob
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
 from serial import Serial
 from serial import SerialTimeoutException
 from serial import SerialException
+from serial.tools import list_ports
+
+from _kaskas.utils.toml_config import TomlConfig
 
 
 def find_serial_ports() -> List[str]:
@@ -22,12 +28,150 @@ def has_available_serial_ports() -> bool:
     return len(find_serial_ports()) > 0
 
 
-def open_next_available_serial(baudrate: int = 115200, timeout: float = 1.5) -> Serial:
-    for port in find_serial_ports():
-        try:
-            ser = Serial(port, baudrate, timeout=timeout)
-            if ser.is_open:
+def serial_port_candidates() -> List[str]:
+    """ All ports a controller may be attached to """
+    return sorted(glob.glob("/dev/ttyACM[0-9]*") + glob.glob("/dev/ttyUSB[0-9]*"))
+
+
+def device_id_of(port: str) -> str:
+    """ A name for the device behind port that survives renumbering, eg. its USB serial number """
+    for info in list_ports.comports():
+        if info.device == port and info.serial_number:
+            return info.serial_number
+    return port
+
+
+def port_of(device_id: str) -> Optional[str]:
+    for info in list_ports.comports():
+        if info.serial_number == device_id or info.device == device_id:
+            return info.device
+    return None
+
+
+def identify_serial_port(port: str, baudrate: int, timeout: float, probe: bytes, reply_prefix: bytes
+                         ) -> Optional[Serial]:
+    """ Open port and write probe to it, returns the open port if a line starting with reply_prefix comes back
+
+    The rest of the reply, eg. the further lines of a multi-line reply, is read and discarded until the port has been
+    quiet for its read timeout, so that whoever takes over the port starts at the beginning of a line.
+    """
+    try:
+        ser = Serial(port, baudrate, timeout=0.1, write_timeout=timeout, exclusive=True)
+    except (SerialException, OSError):
+        return None
+    try:
+        ser.write(probe)
+        deadline = time.monotonic() + timeout
+        resend = time.monotonic() + timeout / 2
+        while time.monotonic() < deadline:
+            line = ser.readline()
+            if line.startswith(reply_prefix):
+                while ser.readline() and time.monotonic() < deadline:
+                    pass
+                ser.reset_input_buffer()
                 return ser
-        except SerialTimeoutException:
-            pass
-    raise SerialException("No serial ports available")
+            if time.monotonic() >= resend:
+                ser.write(probe)  # the board may have missed it while it was resetting after the port opened
+                resend = deadline
+    except (SerialException, SerialTimeoutException, OSError):
+        pass
+    ser.close()
+    return None
+
+
+def probe_serial_ports(ports: List[str], baudrate: int, timeout: float, probe: bytes, reply_prefix: bytes
+                       ) -> Optional[Serial]:
+    """ Identify all ports at once, returns the first port to identify itself, opened """
+    if not ports:
+        return None
+    executor = ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="serial-probe")
+    probes = [executor.submit(identify_serial_port, port, baudrate, timeout, probe, reply_prefix) for port in ports]
+    executor.shutdown(wait=False)
+    for finished in as_completed(probes):
+        ser = finished.result()
+        if ser is not None:
+            for other in probes:  # release the ports of any other device that answers later
+                if other is not finished:
+                    other.add_done_callback(lambda other: other.result() and other.result().close())
+            return ser
+    return None
+
+
+def identify_serial_ports(ports: List[str], baudrate: int, timeout: float, probe: bytes, reply_prefix: bytes
+                          ) -> List[Serial]:
+    """ Identify all ports at once, returns every port that identified itself, opened """
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="serial-probe") as executor:
+        candidates = executor.map(lambda port: identify_serial_port(port, baudrate, timeout, probe, reply_prefix), ports)
+    return [ser for ser in candidates if ser is not None]
+
+
+def open_serial_device(device_id: str, baudrate: int = 115200, timeout: float = 1.5, probe: bytes = b"",
+                       reply_prefix: bytes = b"", identify_timeout: float = 2.5) -> Serial:
+    """ Open the port of a specific device, wherever it is attached now """
+    port = port_of(device_id)
+    ser = identify_serial_port(port, baudrate, identify_timeout, probe, reply_prefix) if port else None
+    if ser is None:
+        raise SerialException(f"Device {device_id} is not attached or does not answer")
+    ser.timeout = timeout
+    return ser
+
+
+class SerialPortBinding:
+    """ Remembers which device, on which port, was identified last """
+
+    _config: TomlConfig
+
+    def __init__(self, config_file: Path) -> None:
+        self._config = TomlConfig(config_file)
+
+    @property
+    def port(self) -> Optional[str]:
+        return str(self._config["serial/port"]) if "serial/port" in self._config else None
+
+    @property
+    def device(self) -> Optional[str]:
+        return str(self._config["serial/device"]) if "serial/device" in self._config else None
+
+    def candidates(self) -> List[str]:
+        """ The ports to try first, most likely first: where the bound device is now, then where it was """
+        preferred = [port_of(self.device) if self.device else None, self.port]
+        return list(dict.fromkeys(port for port in preferred if port))
+
+    def remember(self, port: str) -> None:
+        if self.port == port and self.device == device_id_of(port):
+            return
+        self._config["serial/port"] = port
+        self._config["serial/device"] = device_id_of(port)
+        self._config.save()
+
+
+def open_next_available_serial(baudrate: int = 115200, timeout: float = 1.5, probe: Optional[bytes] = None,
+                               reply_prefix: bytes = b"", binding: Optional[SerialPortBinding] = None,
+                               identify_timeout: float = 2.5) -> Serial:
+    """ Open the first serial port that is available, or with a probe the first that answers it.
+
+    With a binding, the port of the last identified device is tried first, and all other ports are probed in
+    parallel only if it does not answer.
+    """
+    if probe is None:
+        for port in find_serial_ports():
+            try:
+                ser = Serial(port, baudrate, timeout=timeout)
+                if ser.is_open:
+                    return ser
+            except SerialTimeoutException:
+                pass
+        raise SerialException("No serial ports available")
+
+    preferred = binding.candidates() if binding is not None else []
+    ports = [port for port in serial_port_candidates() if port not in preferred]
+    for attempt in (preferred, ports):
+        ser = probe_serial_ports(attempt, baudrate, identify_timeout, probe, reply_prefix)
+        if ser is not None:
+            ser.timeout = timeout
+            if binding is not None:
+                binding.remember(ser.port)
+            return ser
+    raise SerialException("No serial port answered the identification probe")
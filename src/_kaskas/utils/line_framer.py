@@ -0,0 +1,64 @@
+from typing import Iterator
+
+
+class LineFramer:
+    """Incrementally splits a byte stream into lines, carrying partial lines over to the next read
+
+    A line that starts with a zero byte is a binary frame instead, which runs up to the next zero byte. It is yielded
+    with its leading zero byte, so that the first byte tells frames and text lines apart.
+    """
+
+    FRAME_DELIMITER = 0x00
+
+    _buffer: bytearray
+    _max_line_length: int
+
+    def __init__(self, max_line_length: int = 64 * 1024):
+        self._buffer = bytearray()
+        self._max_line_length = max_line_length
+
+    def feed(self, data: bytes) -> None:
+        self._buffer += data
+        if (len(self._buffer) > self._max_line_length and self._buffer.find(b"\n") == -1
+                and self._buffer.find(b"\0", 1) == -1):
+            self._buffer.clear()  # runaway line without terminator; drop it rather than grow without bound
+            raise BufferError(f"Line exceeded {self._max_line_length} bytes without a terminator")
+
+    def lines(self) -> Iterator[memoryview]:
+        """Yield every complete line as a view into the buffer, without its line terminator.
+
+        A yielded view is only valid until the next line is requested.
+        """
+        consumed = 0
+        try:
+            with memoryview(self._buffer) as view:
+                while consumed < len(self._buffer):
+                    start = consumed
+                    if self._buffer[start] == self.FRAME_DELIMITER:
+                        end = self._buffer.find(b"\0", start + 1)
+                        if end == -1:
+                            break
+                        if end == start + 1:  # back-to-back delimiters; the second one opens the next frame
+                            consumed = end
+                            continue
+                        consumed = end + 1
+                        with view[start:end] as frame:
+                            yield frame
+                        continue
+
+                    end = self._buffer.find(b"\n", start)
+                    if end == -1:
+                        break
+                    consumed = end + 1
+                    if end > start and self._buffer[end - 1] == 0x0D:  # strip \r of \r\n
+                        end -= 1
+                    if end > start:
+                        with view[start:end] as line:
+                            yield line
+        finally:
+            del self._buffer[:consumed]
+
+    @property
+    def pending(self) -> int:
+        """Amount of bytes of the partial line that is still awaiting its terminator"""
+        return len(self._buffer)
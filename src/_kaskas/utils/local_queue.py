@@ -0,0 +1,53 @@
+import time
+from collections import deque
+from queue import Empty
+from threading import Condition
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LocalQueue(Generic[T]):
+    """ Unbounded FIFO between threads of one process, a lightweight stand-in for multiprocessing.Queue.
+
+    Items are passed by reference: nothing is pickled and no feeder thread or pipe is involved, so a put is visible
+    to a get right away. Like queue.Queue, get raises queue.Empty when it times out.
+    """
+
+    _items: deque
+    _not_empty: Condition
+
+    def __init__(self) -> None:
+        self._items = deque()
+        self._not_empty = Condition()
+
+    def put(self, item: T) -> None:
+        with self._not_empty:
+            self._items.append(item)
+            self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> T:
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0.0:
+                        raise Empty
+                    self._not_empty.wait(remaining)
+            return self._items.popleft()
+
+    def get_nowait(self) -> T:
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
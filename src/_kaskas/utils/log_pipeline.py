@@ -0,0 +1,255 @@
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Optional
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """ QueueHandler that never blocks its caller: when the queue is full the record is dropped and counted """
+
+    _lock_counters: Lock
+    _dropped: dict[int, int]  # by level, since the last take_dropped
+    dropped: int
+    enqueued: int
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self._lock_counters = Lock()
+        self._dropped = {}
+        self.dropped = 0
+        self.enqueued = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # formatting is up to the listener's handlers, not the thread that logs
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            with self._lock_counters:
+                self._dropped[record.levelno] = self._dropped.get(record.levelno, 0) + 1
+                self.dropped += 1
+
+    def take_dropped(self) -> dict[int, int]:
+        """ The records dropped since the last call, by level """
+        with self._lock_counters:
+            dropped, self._dropped = self._dropped, {}
+            return dropped
+
+
+class GroupCommitFileHandler(logging.Handler):
+    """ Appends records to a file in batches, rotating and gzipping it when it grows too large or too old.
+
+    Records are buffered and written with a single write and flush once flush_bytes are buffered or flush_interval
+    seconds have passed since the last flush. A rotated file is kept as '<name>.<timestamp>.gz', at most
+    backup_count of them.
+    """
+
+    _path: Path
+    _flush_bytes: int
+    _flush_interval: float
+    _max_bytes: Optional[int]
+    _max_age: Optional[float]
+    _backup_count: int
+
+    _file: Optional[object]
+    _buffer: list[str]
+    _buffered: int
+    _size: int
+    _opened: float
+    _last_flush: float
+
+    flushes: int = 0
+    rotations: int = 0
+
+    def __init__(self, path: Path, flush_bytes: int = 64 * 1024, flush_interval: float = 1.0,
+                 max_bytes: Optional[int] = 16 * 1024 * 1024, max_age: Optional[float] = None,
+                 backup_count: int = 8) -> None:
+        super().__init__()
+        self._path = path
+        self._flush_bytes = flush_bytes
+        self._flush_interval = flush_interval
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._backup_count = backup_count
+        self._file = None
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        line = f"{datetime.fromtimestamp(record.created)}: {record.getMessage()}\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self._flush_bytes:
+            self.flush()
+
+    def flush_if_due(self) -> None:
+        if self._buffer and time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer or self._file is None:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+        self.flushes += 1
+        if self._should_rotate():
+            self._rotate()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+    def _open(self) -> None:
+        self._file = open(self._path, mode="a")
+        self._size = self._file.tell()
+        self._opened = time.time()
+
+    def _should_rotate(self) -> bool:
+        return ((self._max_bytes is not None and self._size >= self._max_bytes)
+                or (self._max_age is not None and time.time() - self._opened >= self._max_age))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        rotated = self._path.with_name(f"{self._path.name}.{datetime.now():%Y%m%d-%H%M%S-%f}")
+        os.replace(self._path, rotated)
+        self._open()
+        with open(rotated, "rb") as source, gzip.open(f"{rotated}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        rotated.unlink()
+        self.rotations += 1
+        backups = sorted(self._path.parent.glob(f"{self._path.name}.*.gz"))
+        for backup in backups[:max(0, len(backups) - self._backup_count)]:
+            backup.unlink()
+
+
+class ForwardingHandler(logging.Handler):
+    """ Hands records to a logger, eg. so that they end up at its console handlers, if it is enabled for them """
+
+    _logger: logging.Logger
+
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__()
+        self._logger = logger
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._logger.isEnabledFor(record.levelno):
+            self._logger.handle(record)
+
+
+class LogRingBuffer(logging.Handler):
+    """ Keeps the last `capacity` records in preallocated arrays, numbered in the order they arrived """
+
+    _capacity: int
+    _times: array
+    _levels: array
+    _texts: list[str]
+    _next: int  # sequence number of the next record
+
+    def __init__(self, capacity: int = 2048) -> None:
+        super().__init__()
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._levels = array("B", bytes(capacity))
+        self._texts = [""] * capacity
+        self._next = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        index = self._next % self._capacity
+        self._times[index] = record.created
+        self._levels[index] = record.levelno
+        self._texts[index] = record.getMessage()
+        self._next += 1
+
+    def records(self, since: Optional[int] = None, limit: int = 100) -> list[dict]:
+        """ Up to limit records from sequence number since onwards, or the last limit records without since """
+        with self.lock:
+            oldest = max(0, self._next - self._capacity)
+            first = max(oldest, self._next - limit) if since is None else max(oldest, since)
+            last = min(self._next, first + limit)
+            return [dict(seq=seq, time=self._times[seq % self._capacity],
+                         level=logging.getLevelName(self._levels[seq % self._capacity]),
+                         text=self._texts[seq % self._capacity])
+                    for seq in range(first, last)]
+
+
+class LogListener:
+    """ Drains the queue of a BoundedQueueHandler into handlers on a thread of its own.
+
+    Unlike logging.handlers.QueueListener, it also wakes up while the queue is idle, to flush file handlers that group
+    their writes and to report records that were dropped because the queue was full.
+    """
+
+    _source: BoundedQueueHandler
+    _handlers: list[logging.Handler]
+    _idle_interval: float
+    _thread: Thread
+
+    _sentinel = None
+
+    def __init__(self, source: BoundedQueueHandler, handlers: list[logging.Handler], idle_interval: float = 0.5):
+        self._source = source
+        self._handlers = handlers
+        self._idle_interval = idle_interval
+        self._thread = Thread(target=self._runner)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """ Handle everything queued so far, then flush and close the handlers """
+        self._source.queue.put(self._sentinel)  # may block briefly on a full queue, which the listener drains
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _runner(self) -> None:
+        while True:
+            try:
+                record = self._source.queue.get(timeout=self._idle_interval)
+            except queue.Empty:
+                self._report_dropped()
+                self._flush_if_due()
+                continue
+            if record is self._sentinel:
+                break
+            for handler in self._handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            self._flush_if_due()
+
+        self._report_dropped()
+        for handler in self._handlers:
+            handler.close()
+
+    def _flush_if_due(self) -> None:
+        for handler in self._handlers:
+            if isinstance(handler, GroupCommitFileHandler):
+                handler.flush_if_due()
+
+    def _report_dropped(self) -> None:
+        dropped = self._source.take_dropped()
+        if dropped:
+            summary = ", ".join(f"{count} {logging.getLevelName(level)}" for level, count in sorted(dropped.items()))
+            record = logging.LogRecord("kaskas", logging.WARNING, "", 0, f"Log queue full, dropped: {summary}", None,
+                                       None)
+            for handler in self._handlers:
+                handler.handle(record)
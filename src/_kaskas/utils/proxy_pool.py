@@ -0,0 +1,123 @@
+import threading
+from threading import Lock
+from typing import Any
+
+import Pyro5.api
+import Pyro5.core
+import Pyro5.errors
+
+
+class PooledProxy:
+    """ Stand-in for a Pyro proxy that may be shared between threads: every call goes through the pooled proxy of the
+    calling thread, so connections are reused and never change owner """
+
+    __slots__ = ("_pool", "_address")
+
+    _pool: "ProxyPool"
+    _address: str
+
+    def __init__(self, pool: "ProxyPool", address: str) -> None:
+        self._pool = pool
+        self._address = address
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            proxy = self._pool.connected(self._address)
+            try:
+                return getattr(proxy, name)(*args, **kwargs)
+            except Pyro5.errors.CommunicationError:
+                self._pool.discard(self._address)  # it may not have been executed, so the call is not repeated
+                raise
+
+        return call
+
+    def __repr__(self) -> str:
+        return f"<PooledProxy {self._address}>"
+
+
+class ProxyPool:
+    """ Keeps one connected Pyro proxy per thread and address, and the URI every address resolved to.
+
+    A PYRONAME address is looked up at the nameserver only once. When a connection fails, the proxy is dropped and the
+    address is resolved again, so a restarted daemon on another port is found on the next call.
+    """
+
+    _lock: Lock
+    _local: threading.local
+    _resolved: dict[str, Pyro5.core.URI]
+    _handles: dict[str, PooledProxy]
+    _statistics: dict[str, int]
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._local = threading.local()
+        self._resolved = {}
+        self._handles = {}
+        self._statistics = dict(connections=0, reused=0, resolutions=0, failures=0)
+
+    def handle(self, address: str) -> PooledProxy:
+        """ The shared stand-in proxy for address, see PooledProxy """
+        with self._lock:
+            handle = self._handles.get(address)
+            if handle is None:
+                handle = self._handles[address] = PooledProxy(self, address)
+            return handle
+
+    def connected(self, address: str) -> Pyro5.api.Proxy:
+        """ The proxy of this thread for address, connected; resolves the address again if connecting fails """
+        proxies = self._proxies()
+        proxy = proxies.get(address)
+        if proxy is not None and proxy._pyroConnection is not None:
+            self._count("reused")
+            return proxy
+        try:
+            return self._connect(address)
+        except Pyro5.errors.CommunicationError:
+            self.discard(address)
+            return self._connect(address)
+
+    def discard(self, address: str) -> None:
+        """ Forget the proxy of this thread and the resolved URI of address, after its connection failed """
+        self._count("failures")
+        proxy = self._proxies().pop(address, None)
+        if proxy is not None:
+            proxy._pyroRelease()
+        with self._lock:
+            self._resolved.pop(address, None)
+
+    def statistics(self) -> dict[str, int]:
+        """ Connections made and calls that reused one, name resolutions and failed connections """
+        with self._lock:
+            return dict(self._statistics)
+
+    def _connect(self, address: str) -> Pyro5.api.Proxy:
+        proxies = self._proxies()
+        proxy = proxies.get(address)
+        if proxy is None:
+            proxy = proxies[address] = Pyro5.api.Proxy(self._resolve(address))
+        proxy._pyroBind()
+        self._count("connections")
+        return proxy
+
+    def _resolve(self, address: str) -> Pyro5.core.URI:
+        with self._lock:
+            uri = self._resolved.get(address)
+        if uri is None:
+            uri = Pyro5.core.resolve(address)
+            with self._lock:
+                self._resolved[address] = uri
+                self._statistics["resolutions"] += 1
+        return uri
+
+    def _proxies(self) -> dict[str, Pyro5.api.Proxy]:
+        proxies = getattr(self._local, "proxies", None)
+        if proxies is None:
+            proxies = self._local.proxies = {}
+        return proxies
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._statistics[name] += 1
@@ -0,0 +1,62 @@
+"""Test cases for the cobs module."""
+import pytest
+
+from _kaskas.utils.cobs import cobs_decode, cobs_encode, crc16, seal, unseal
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\0",
+    b"\0\0",
+    b"\x11\x22\0\x33",
+    b"\n\0\n",
+    bytes(range(1, 254)),
+    bytes(range(1, 255)),  # exactly one full block
+    bytes(range(1, 256)),  # one byte past a full block
+    bytes(1000),
+    bytes(i % 256 for i in range(1000)),
+])
+def test_cobs_round_trip(data):
+    encoded = cobs_encode(data)
+    assert 0 not in encoded
+    assert len(encoded) <= len(data) + 1 + len(data) // 254
+    assert cobs_decode(encoded) == data
+
+
+def test_cobs_known_encodings():
+    assert cobs_encode(b"") == b"\x01"
+    assert cobs_encode(b"\0") == b"\x01\x01"
+    assert cobs_encode(b"\x11\x22\0\x33") == b"\x03\x11\x22\x02\x33"
+    assert cobs_encode(bytes(range(1, 255))) == b"\xff" + bytes(range(1, 255)) + b"\x01"
+
+
+@pytest.mark.parametrize("encoded", [
+    b"\x03\x11",  # block runs past the end
+    b"\x02\x11\0",  # zero byte inside an encoded block
+    b"\0",
+])
+def test_cobs_decode_rejects_malformed_input(encoded):
+    with pytest.raises(ValueError):
+        cobs_decode(encoded)
+
+
+def test_crc16_ccitt_false_check_value():
+    assert crc16(b"123456789") == 0x29B1
+    assert crc16(b"") == 0xFFFF
+
+
+def test_seal_round_trip():
+    payload = b"\x02\0\x01\n\0" + bytes(300)
+    sealed = seal(payload)
+    assert 0 not in sealed
+    assert unseal(sealed) == payload
+
+
+def test_unseal_rejects_corrupt_and_truncated_frames():
+    payload = b"\x02\x01\x00\x05\x00\x00"
+    with pytest.raises(ValueError):
+        unseal(cobs_encode(payload + b"\x00\x00"))  # crc16 does not match
+    with pytest.raises(ValueError):
+        unseal(seal(payload)[:-1])
+    with pytest.raises(ValueError):
+        unseal(cobs_encode(b"\x01"))  # too short to carry a crc16
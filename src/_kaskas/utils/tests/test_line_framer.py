@@ -0,0 +1,64 @@
+"""Test cases for the line framer."""
+import pytest
+
+from _kaskas.utils.cobs import seal
+from _kaskas.utils.line_framer import LineFramer
+
+
+def drain(framer: LineFramer) -> list[bytes]:
+    return [bytes(line) for line in framer.lines()]
+
+
+def test_text_lines_are_split_and_carried_over():
+    framer = LineFramer()
+    framer.feed(b"#log line\r\n@Fluids<OK:Tr")
+    assert drain(framer) == [b"#log line"]
+    assert framer.pending == len(b"@Fluids<OK:Tr")
+
+    framer.feed(b"ue>\n\n")
+    assert drain(framer) == [b"@Fluids<OK:True>"]
+    assert framer.pending == 0
+
+
+def test_frames_and_text_lines_interleave():
+    frame = seal(b"\x02\x01\x00\x05\x00\x00")
+    framer = LineFramer()
+    framer.feed(b"#before\n\0" + frame + b"\0#after\n")
+    assert drain(framer) == [b"#before", b"\0" + frame, b"#after"]
+
+
+def test_frame_containing_newline_is_not_split():
+    frame = seal(b"\n\n\x02\n")
+    assert b"\n" in frame
+    framer = LineFramer()
+    framer.feed(b"\0" + frame + b"\0")
+    assert drain(framer) == [b"\0" + frame]
+
+
+def test_back_to_back_delimiters_open_the_next_frame():
+    first, second = seal(b"\x02first"), seal(b"\x02second")
+    framer = LineFramer()
+    framer.feed(b"\0" + first + b"\0\0" + second + b"\0")
+    assert drain(framer) == [b"\0" + first, b"\0" + second]
+
+    framer.feed(b"\0\0\0")
+    assert drain(framer) == []
+    assert framer.pending == 1  # the last delimiter may open a frame yet to come
+
+
+def test_truncated_frame_waits_for_its_delimiter():
+    frame = seal(bytes(300))
+    framer = LineFramer()
+    framer.feed(b"\0" + frame[:100])
+    assert drain(framer) == []
+    framer.feed(frame[100:] + b"\0")
+    assert drain(framer) == [b"\0" + frame]
+
+
+def test_runaway_line_is_dropped():
+    framer = LineFramer(max_line_length=16)
+    with pytest.raises(BufferError):
+        framer.feed(b"x" * 17)
+    assert framer.pending == 0
+    framer.feed(b"#ok\n")
+    assert drain(framer) == [b"#ok"]